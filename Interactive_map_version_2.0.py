@@ -1,15 +1,19 @@
 # Import the folium library for creating interactive maps
 import folium
 # Import plugins for more advanced features
-from folium.plugins import Fullscreen, MiniMap, Draw, Geocoder
+from folium.plugins import Fullscreen, MiniMap, Draw, Geocoder, FastMarkerCluster
+# Shared helpers that add layers in bulk, round coordinates and save the map as plain and pre-compressed HTML,
+# plus the base map, landmarks and area features shared with versions 1.0 and 3.0
+from map_helpers import LANDMARKS, bulk_add, city_circle_marker, landmark_popup, london_base_map, park_polygon, round_coords, save_compressed
 
 # --- 1. Create a base map ---
 # Initialize a Folium map object
 # 'location' sets the initial center coordinates (latitude, longitude)
 # 'zoom_start' sets the initial zoom level
 # 'tiles' specifies the map tile style (e.g., OpenStreetMap, Stamen Terrain, CartoDB positron)
+# london_base_map() centers the map near London at zoom 10 with OpenStreetMap tiles
 print("Creating a base map centered near London...")
-m = folium.Map(location=[51.5074, -0.1278], zoom_start=10, tiles='OpenStreetMap')
+m = london_base_map()
 
 # --- 2. Add Layer Control for toggling layers ---
 # This is typically added at the end, but defining it early allows grouping
@@ -22,61 +26,51 @@ geojson_group = folium.FeatureGroup(name='Sample GeoJSON Data').add_to(m)
 # --- 3. Add markers to the map within the 'markers_group' ---
 # Markers are points on the map, often with popups showing information
 
-# Example 1: London Eye
+# The markers are shipped to the browser as one compact data array and built there by
+# FastMarkerCluster, instead of emitting a separate Leaflet marker block for every landmark.
 print("Adding markers to the map...")
-folium.Marker(
-    location=[51.5033, -0.1196], # Latitude, Longitude
-    popup="<b>London Eye</b><br>Famous Ferris wheel on the South Bank of the River Thames.", # Text that appears when clicked
-    tooltip="Click for info" # Text that appears on hover
-).add_to(markers_group) # Add to the markers_group
-
-# Example 2: British Museum
-folium.Marker(
-    location=[51.5194, -0.1269],
-    popup="<b>British Museum</b><br>World-renowned museum of human history, art and culture.",
-    icon=folium.Icon(color='red', icon='info-sign') # Custom icon with a specific color and symbol
-).add_to(markers_group) # Add to the markers_group
-
-# Example 3: Buckingham Palace with a custom icon
-folium.Marker(
-    location=[51.5014, -0.1419],
-    popup="<b>Buckingham Palace</b><br>The King's official London residence.",
-    icon=folium.Icon(color='purple', icon='home', prefix='fa') # Using Font Awesome icon 'home'
-).add_to(markers_group) # Add to the markers_group
+# JavaScript that turns one data row into a Leaflet marker in the browser
+# Row layout: [lat, lon, popup HTML, tooltip or null, icon options or null]
+LANDMARK_CALLBACK = """
+function (row) {
+    var marker = L.marker([row[0], row[1]]);
+    if (row[4]) { marker.setIcon(L.AwesomeMarkers.icon(row[4])); }
+    marker.bindPopup(row[2]);
+    if (row[3]) { marker.bindTooltip(row[3]); }
+    return marker;
+}
+"""
+# Tooltip and icon options per landmark, in the order of LANDMARKS
+LANDMARK_EXTRAS = [
+    # Example 1: London Eye
+    ("Click for info", None),
+    # Example 2: British Museum
+    # Custom icon with a specific color and symbol
+    (None, {'markerColor': 'red', 'icon': 'info-sign', 'prefix': 'glyphicon'}),
+    # Example 3: Buckingham Palace with a custom icon
+    # Using Font Awesome icon 'home'
+    (None, {'markerColor': 'purple', 'icon': 'home', 'prefix': 'fa'}),
+]
+landmark_data = [
+    [*location, landmark_popup(name, description), tooltip, icon]
+    for (name, location, description), (tooltip, icon) in zip(LANDMARKS, LANDMARK_EXTRAS)
+]
+FastMarkerCluster(landmark_data, callback=LANDMARK_CALLBACK).add_to(markers_group) # Add to the markers_group
 
 
 # --- 4. Add a CircleMarker for an area of interest within 'shapes_group' ---
 # Circle markers can represent areas or points with a defined radius
 print("Adding a circle marker...")
-folium.CircleMarker(
-    location=[51.51, -0.09], # Center of the circle
-    radius=50, # Radius in pixels
-    popup="City of London Financial District",
-    color='#3186cc', # Border color
-    fill=True,
-    fill_color='#3186cc', # Fill color
-    fill_opacity=0.4 # Transparency of the fill
-).add_to(shapes_group) # Add to the shapes_group
+circle_marker = city_circle_marker()
 
 
 # --- 5. Add a simple Polygon (e.g., representing a small park area) within 'shapes_group' ---
 # Polygons require a list of coordinates that define its boundaries
 print("Adding a polygon...")
-folium.Polygon(
-    locations=[
-        [51.509, -0.10],
-        [51.509, -0.09],
-        [51.508, -0.09],
-        [51.508, -0.10],
-        [51.509, -0.10] # Close the polygon
-    ],
-    color='green',
-    weight=3,
-    fill=True,
-    fill_color='lightgreen',
-    fill_opacity=0.6,
-    popup="Small Park Area"
-).add_to(shapes_group) # Add to the shapes_group
+park = park_polygon()
+
+# Register both shapes on the shapes_group in one step
+bulk_add(shapes_group, [circle_marker, park])
 
 
 # --- 6. Add a sample GeoJSON layer ---
@@ -109,8 +103,9 @@ sample_geojson_data = {
       }
     ]
 }
+round_coords(sample_geojson_data)
 
-folium.GeoJson(
+sample_geojson_layer = folium.GeoJson(
     sample_geojson_data,
     name='Sample GeoJSON Polygon',
     tooltip=folium.features.GeoJsonTooltip(fields=['name', 'description']),
@@ -120,7 +115,8 @@ folium.GeoJson(
         'weight': 3,
         'fillOpacity': 0.5
     }
-).add_to(geojson_group) # Add to the geojson_group
+)
+bulk_add(geojson_group, [sample_geojson_layer]) # Add to the geojson_group
 
 # --- 7. Add plugins for enhanced interactivity ---
 
@@ -130,7 +126,13 @@ Fullscreen().add_to(m)
 
 # Add MiniMap (overview map)
 print("Adding MiniMap plugin...")
-MiniMap().add_to(m)
+# The minimap uses a single lightweight raster style and starts collapsed ('minimized'),
+# so it only requests its own tiles once the user expands it
+MiniMap(
+    tile_layer=folium.TileLayer('CartoDB positron', attr='&copy; <a href="https://carto.com/attributions">CartoDB</a>'),
+    toggle_display=True, # toggle_display allows collapsing the minimap
+    minimized=True
+).add_to(m)
 
 # Add Draw tools
 # This allows users to draw markers, polygons, circles, rectangles, and lines on the map.
@@ -150,6 +152,10 @@ folium.LayerControl().add_to(m)
 
 
 # --- 8. Save the map to an HTML file ---
-output_file = 'interactive_map.html'
-m.save(output_file)
-print(f"Enhanced map successfully generated and saved to '{output_file}'")
+# build_all.py runs this script under another name and saves 'm' itself
+if __name__ == '__main__':
+    output_file = 'interactive_map.html'
+    compressed_files = save_compressed(m, output_file)
+    print(f"Enhanced map successfully generated and saved to '{output_file}'")
+    for compressed_file in compressed_files:
+        print(f"Compressed copy for static hosting saved to '{compressed_file}'")
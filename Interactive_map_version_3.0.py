@@ -1,32 +1,120 @@
 # Import the folium library for creating interactive maps
 import folium
 # Import plugins for more advanced features
-from folium.plugins import Fullscreen, MiniMap, Draw, Geocoder, MousePosition, MeasureControl
-# Import pandas for data manipulation, especially for Choropleth data
-import pandas as pd
+from folium.plugins import Fullscreen, MiniMap, Draw, Geocoder, MousePosition, MeasureControl, FastMarkerCluster, VectorGridProtobuf
+# Import numpy for the precomputed choropleth colour table
+import numpy as np
 # Import branca for colormaps
 from branca.colormap import linear
+# Import json, os, time and urllib to read and cache the vector tile source's TileJSON
+import json
+import os
+import time
+import urllib.request
+# Shared helpers that download the popup images and save the map as plain and pre-compressed HTML,
+# plus the base map, landmarks and area features shared with versions 1.0 and 2.0
+from map_helpers import (
+    ASSET_DIR, FETCH_TIMEOUT, LANDMARKS, bulk_add, city_circle_marker, fetch_asset, landmark_popup, london_base_map,
+    park_polygon, round_coords, save_compressed
+)
+
+# --- Helper: look up the current tile URL of a vector tile source ---
+# Tile providers such as OpenFreeMap publish their tiles as dated snapshots and remove old ones,
+# so the URL is read from the source's TileJSON document when the map is saved.
+# The document is kept in ./assets/<cache_file> and reused for TILEJSON_MAX_AGE seconds, so
+# repeated builds do not wait on the network each time.
+# Returns None if the document cannot be fetched or has no 'tiles' entry (e.g. when offline).
+TILEJSON_MAX_AGE = 24 * 60 * 60 # One day; snapshots are replaced far less often than that
+
+def resolve_tile_url(tilejson_url, cache_file):
+    cache_path = os.path.join(ASSET_DIR, cache_file)
+    try:
+        if time.time() - os.path.getmtime(cache_path) < TILEJSON_MAX_AGE:
+            with open(cache_path, encoding='utf-8') as f:
+                return json.load(f)['tiles'][0]
+    except (OSError, ValueError, KeyError, IndexError, TypeError):
+        pass # No usable cached copy; read the document again
+    try:
+        with urllib.request.urlopen(tilejson_url, timeout=FETCH_TIMEOUT) as response:
+            document = json.load(response)
+        tiles_url = document['tiles'][0]
+    except (OSError, ValueError, KeyError, IndexError, TypeError):
+        return None
+    os.makedirs(ASSET_DIR, exist_ok=True)
+    partial = f'{cache_path}.{os.getpid()}.part'
+    with open(partial, 'w', encoding='utf-8') as f:
+        json.dump(document, f)
+    os.replace(partial, cache_path)
+    return tiles_url
+
 
 # --- 1. Create a base map ---
 # Initialize a Folium map object
 # 'location' sets the initial center coordinates (latitude, longitude)
 # 'zoom_start' sets the initial zoom level
-# 'tiles' specifies the initial map tile style
+# london_base_map() fills in the shared center and zoom level
+# 'tiles' is None here because the base layers are added in section 2
+# 'minZoom'/'maxZoom' are passed straight to Leaflet's map options; they keep every layer
+# from requesting tiles outside the zoom range the map is used at
 print("Creating a base map centered near London...")
-m = folium.Map(
-    location=[51.5074, -0.1278],
-    zoom_start=10,
-    tiles='OpenStreetMap',
-    attr='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors' # Added attribution
-)
+m = london_base_map(tiles=None, minZoom=2, maxZoom=18)
+
+# --- 2. Add the base map layers ---
+# The default base map is drawn from vector tiles: one compact binary tile per view cell,
+# styled in the browser, instead of a PNG per tile for every raster style.
+# The styles below cover the OpenMapTiles layers; an empty list hides a layer (labels, POIs).
+print("Adding base map layers...")
+vector_base_styles = {
+    'water': {'fill': True, 'weight': 0, 'fillColor': '#aad3df', 'fillOpacity': 1},
+    'waterway': {'weight': 1, 'color': '#aad3df'},
+    'landcover': {'fill': True, 'weight': 0, 'fillColor': '#d8e8c8', 'fillOpacity': 0.6},
+    'landuse': {'fill': True, 'weight': 0, 'fillColor': '#ece7e1', 'fillOpacity': 0.6},
+    'park': {'fill': True, 'weight': 0, 'fillColor': '#c8facc', 'fillOpacity': 0.7},
+    'aeroway': {'weight': 1, 'color': '#bbbbcc'},
+    'building': {'fill': True, 'weight': 0, 'fillColor': '#d9d0c9', 'fillOpacity': 0.8},
+    'transportation': {'weight': 1, 'color': '#ffffff'},
+    'boundary': {'weight': 1, 'color': '#9e9cab', 'dashArray': '4, 4'},
+    'transportation_name': [],
+    'water_name': [],
+    'place': [],
+    'poi': [],
+    'housenumber': [],
+    'mountain_peak': [],
+    'aerodrome_label': [],
+}
+# The tile URL comes from OpenFreeMap's TileJSON, read by use_current_vector_tiles() just before
+# the map is saved. Until then, and if it cannot be read, the last known snapshot in
+# OPENFREEMAP_FALLBACK_TILES is used; to update it, copy the 'tiles' entry from OPENFREEMAP_TILEJSON.
+# That snapshot may already have been removed, so the raster map below is then the default base map
+# and the vector map is only offered in the LayerControl.
+OPENFREEMAP_TILEJSON = 'https://tiles.openfreemap.org/planet'
+OPENFREEMAP_FALLBACK_TILES = 'https://tiles.openfreemap.org/planet/20240101_001001_pt/{z}/{x}/{y}.pbf'
+vector_base_map = VectorGridProtobuf(
+    OPENFREEMAP_FALLBACK_TILES,
+    name='Vector Base Map',
+    options={
+        'vectorTileLayerStyles': vector_base_styles,
+        'maxNativeZoom': 14, # The tile set stops at zoom 14; deeper zooms reuse those tiles
+        'attribution': '<a href="https://openfreemap.org">OpenFreeMap</a> &copy; <a href="https://www.openmaptiles.org/">OpenMapTiles</a> &copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
+    },
+    overlay=False, # A base layer (radio button) rather than an overlay
+    show=False
+).add_to(m)
 
-# --- 2. Add multiple Tile Layers for base map switching ---
-# These layers will be available through the LayerControl
-print("Adding additional tile layers...")
-folium.TileLayer('CartoDB positron', name='Light Mode', attr='&copy; <a href="https://carto.com/attributions">CartoDB</a>').add_to(m)
-folium.TileLayer('CartoDB dark_matter', name='Dark Mode', attr='&copy; <a href="https://carto.com/attributions">CartoDB</a>').add_to(m)
-folium.TileLayer('Stamen Toner', name='Toner', attr='Map tiles by <a href="http://stamen.com">Stamen Design</a>, <a href="http://creativecommons.org/licenses/by/3.0">CC BY 3.0</a> &mdash; Map data &copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors').add_to(m)
-folium.TileLayer('Stamen Terrain', name='Terrain', attr='Map tiles by <a href="http://stamen.com">Stamen Design</a>, <a href="http://creativecommons.org/licenses/by/3.0">CC BY 3.0</a> &mdash; Map data &copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors').add_to(m)
+# Raster fallback base map, available through the LayerControl (the default if the vector tile URL is not current)
+raster_base_map = folium.TileLayer('CartoDB positron', name='Light Mode (raster)', attr='&copy; <a href="https://carto.com/attributions">CartoDB</a>').add_to(m)
+
+def use_current_vector_tiles():
+    """Point the vector base map at the current OpenFreeMap snapshot and make it the default base map.
+
+    If the TileJSON cannot be read the fallback URL stays in place and the raster map stays the default.
+    Called before saving, by this script and by build_all.py, so importing the script never waits on the network.
+    """
+    tiles_url = resolve_tile_url(OPENFREEMAP_TILEJSON, 'openfreemap-planet.json')
+    if tiles_url is not None:
+        vector_base_map.url = tiles_url
+        vector_base_map.show = True
+        raster_base_map.show = False
 
 
 # --- 3. Add FeatureGroups for better layer organization ---
@@ -42,69 +130,79 @@ geojson_group = folium.FeatureGroup(name='Sample GeoJSON Data').add_to(m)
 # --- 4. Add markers to the map within the 'markers_group' ---
 # Markers are points on the map, often with popups showing information
 
-# Example 1: London Eye
+# The markers are shipped to the browser as one compact data array and built there by
+# FastMarkerCluster, instead of emitting a separate Leaflet marker block for every landmark.
 print("Adding markers to the map...")
-folium.Marker(
-    location=[51.5033, -0.1196], # Latitude, Longitude
-    popup=folium.Popup("<b>London Eye</b><br><i>Famous Ferris wheel</i><br><img src='https://placehold.co/100x60/ADD8E6/000000?text=Eye' width='100px'>", max_width=300), # Popup with HTML and image
-    tooltip="Click for London Eye info" # Text that appears on hover
-).add_to(markers_group) # Add to the markers_group
-
-# Example 2: British Museum with custom Font Awesome icon
-folium.Marker(
-    location=[51.5194, -0.1269],
-    popup="<b>British Museum</b><br>World-renowned museum of human history, art and culture.",
-    icon=folium.Icon(color='red', icon='info-sign', prefix='glyphicon'), # Using 'glyphicon' prefix for info-sign
-    tooltip="British Museum"
-).add_to(markers_group)
-
-# Example 3: Buckingham Palace with a custom image icon
-print("Adding custom image marker...")
-folium.Marker(
-    location=[51.5014, -0.1419],
-    popup=folium.Popup("<b>Buckingham Palace</b><br>The King's official London residence.<br><img src='https://placehold.co/100x60/FFF8DC/000000?text=Palace' width='100px'>", max_width=300),
-    icon=folium.CustomIcon(
-        icon_image='https://placehold.co/32x32/FFD700/000000?text=👑', # Placeholder for a crown icon
-        icon_size=(32, 32),
-        icon_anchor=(16, 32),
-        popup_anchor=(0, -20)
-    ),
-    tooltip="Buckingham Palace"
-).add_to(markers_group)
+
+# Popup images are downloaded once into ./assets/ and referenced by relative path,
+# so every open of the map reads them from disk (or the browser cache) instead of placehold.co.
+EYE_IMAGE = fetch_asset('https://placehold.co/100x60/ADD8E6/000000.png?text=Eye', 'eye.png')
+PALACE_IMAGE = fetch_asset('https://placehold.co/100x60/FFF8DC/000000.png?text=Palace', 'palace.png')
+CROWN_ICON = fetch_asset('https://placehold.co/32x32/FFD700/000000.png?text=%F0%9F%91%91', 'crown.png') # Placeholder for a crown icon (URL-encoded 👑)
+
+# Popup HTML is kept in one module-level tuple instead of inline in every marker.
+# Leaflet only builds the popup DOM the first time a marker is clicked.
+# The order follows LANDMARKS; the British Museum keeps the shared popup text.
+POPUP_HTML = (
+    f"<b>London Eye</b><br><i>Famous Ferris wheel</i><br><img src='{EYE_IMAGE}' width='100px'>",
+    landmark_popup(LANDMARKS[1][0], LANDMARKS[1][2]),
+    f"<b>Buckingham Palace</b><br>The King's official London residence.<br><img src='{PALACE_IMAGE}' width='100px'>",
+)
+
+# Ask the browser to start loading the popup images early so the first click shows them immediately
+for image in (EYE_IMAGE, PALACE_IMAGE):
+    m.get_root().header.add_child(folium.Element(f'<link rel="preload" as="image" href="{image}">'))
+
+# JavaScript that turns one data row into a Leaflet marker in the browser
+# Row layout: [lat, lon, popup HTML, tooltip, icon options or null]
+# Icon options with an 'iconUrl' become an image icon, all others a Font Awesome / glyphicon marker.
+LANDMARK_CALLBACK = """
+function (row) {
+    var marker = L.marker([row[0], row[1]]);
+    if (row[4]) {
+        marker.setIcon(row[4].iconUrl ? L.icon(row[4]) : L.AwesomeMarkers.icon(row[4]));
+    }
+    marker.bindPopup(row[2], {maxWidth: 300});
+    marker.bindTooltip(row[3]);
+    return marker;
+}
+"""
+# Tooltip and icon options per landmark, in the order of LANDMARKS
+LANDMARK_EXTRAS = [
+    # Example 1: London Eye
+    # Popup with HTML and image
+    ("Click for London Eye info", None),
+    # Example 2: British Museum with custom Font Awesome icon
+    # Using 'glyphicon' prefix for info-sign
+    ("British Museum", {'markerColor': 'red', 'icon': 'info-sign', 'prefix': 'glyphicon'}),
+    # Example 3: Buckingham Palace with a custom image icon
+    ("Buckingham Palace", {
+        'iconUrl': CROWN_ICON,
+        'iconSize': [32, 32],
+        'iconAnchor': [16, 32],
+        'popupAnchor': [0, -20]
+    }),
+]
+landmark_data = [
+    [*location, popup, tooltip, icon]
+    for (_, location, _), popup, (tooltip, icon) in zip(LANDMARKS, POPUP_HTML, LANDMARK_EXTRAS)
+]
+FastMarkerCluster(landmark_data, callback=LANDMARK_CALLBACK).add_to(markers_group)
 
 
 # --- 5. Add a CircleMarker for an area of interest within 'shapes_group' ---
 # Circle markers can represent areas or points with a defined radius
 print("Adding a circle marker...")
-folium.CircleMarker(
-    location=[51.51, -0.09], # Center of the circle
-    radius=50, # Radius in pixels
-    popup="City of London Financial District",
-    color='#3186cc', # Border color
-    fill=True,
-    fill_color='#3186cc', # Fill color
-    fill_opacity=0.4 # Transparency of the fill
-).add_to(shapes_group)
+circle_marker = city_circle_marker()
 
 
 # --- 6. Add a simple Polygon within 'shapes_group' ---
 # Polygons require a list of coordinates that define its boundaries
 print("Adding a polygon...")
-folium.Polygon(
-    locations=[
-        [51.509, -0.10],
-        [51.509, -0.09],
-        [51.508, -0.09],
-        [51.508, -0.10],
-        [51.509, -0.10] # Close the polygon
-    ],
-    color='green',
-    weight=3,
-    fill=True,
-    fill_color='lightgreen',
-    fill_opacity=0.6,
-    popup="Small Park Area"
-).add_to(shapes_group)
+park = park_polygon()
+
+# Register both shapes on the shapes_group in one step
+bulk_add(shapes_group, [circle_marker, park])
 
 
 # --- 7. Add a sample GeoJSON layer (FeatureCollection) within 'geojson_group' ---
@@ -152,18 +250,21 @@ sample_geojson_data = {
       }
     ]
 }
+round_coords(sample_geojson_data)
 
-folium.GeoJson(
+# Styles are built once per geometry type, so the style function is a single dictionary lookup
+STYLE_BY_TYPE = {
+    'Polygon': {'fillColor': '#6a0dad', 'color': '#6a0dad', 'weight': 3, 'fillOpacity': 0.5},
+    'LineString': {'color': '#000000', 'weight': 5, 'fillOpacity': 0}, # Only fill for polygons
+}
+
+sample_geojson_layer = folium.GeoJson(
     sample_geojson_data,
     name='Sample GeoJSON Features',
     tooltip=folium.features.GeoJsonTooltip(fields=['name', 'description']),
-    style_function=lambda x: {
-        'fillColor': x['properties'].get('fillColor', '#0000ff'),
-        'color': x['properties'].get('strokeColor', '#0000ff') if x['geometry']['type'] == 'Polygon' else x['properties'].get('color', '#0000ff'),
-        'weight': x['properties'].get('weight', 3),
-        'fillOpacity': x['properties'].get('fillOpacity', 0.5) if x['geometry']['type'] == 'Polygon' else 0, # Only fill for polygons
-    }
-).add_to(geojson_group)
+    style_function=lambda x: STYLE_BY_TYPE[x['geometry']['type']]
+)
+bulk_add(geojson_group, [sample_geojson_layer])
 
 
 # --- 8. Add a Choropleth Map (sample data for simplified 'boroughs') ---
@@ -198,49 +299,52 @@ simplified_london_boroughs = {
         }
     ]
 }
+round_coords(simplified_london_boroughs)
 
 # Corresponding population data for the simplified boroughs
-# 'feature_id' here matches the 'id' in the GeoJSON features
-population_data = [
-    {'feature_id': 'BoroughA', 'population': 80000},
-    {'feature_id': 'BoroughB', 'population': 120000}
-]
-
-# Convert population_data to a pandas DataFrame to ensure correct data types for Choropleth
-population_df = pd.DataFrame(population_data)
+# The keys here match the 'id' in the GeoJSON features
+population_by_id = {'BoroughA': 80000, 'BoroughB': 120000}
 
 # Create a colormap for the choropleth
-# It's important to use the min/max of the 'population' column from the DataFrame
-colormap = linear.YlGnBu_09.scale(population_df['population'].min(), population_df['population'].max())
+# It's important to use the min/max of the population values
+vmin, vmax = min(population_by_id.values()), max(population_by_id.values())
+colormap = linear.YlGnBu_09.scale(vmin, vmax)
+colormap.caption = 'Population (Sample Data)'
+
+# Precompute a 256-entry colour table over the data range once.
+# Styling a borough is then a binary search into 'bins' plus a table lookup,
+# instead of evaluating the branca colormap for every feature.
+bins = np.linspace(vmin, vmax, 256)
+palette = np.array([colormap.rgb_hex_str(x) for x in bins])
+
+# Copy the population onto each feature so the tooltip can show it,
+# and build each borough's complete style once from the colour table
+CHOROPLETH_STYLE_BY_ID = {}
+for feature in simplified_london_boroughs['features']:
+    population = population_by_id[feature['id']]
+    feature['properties']['population'] = population
+    CHOROPLETH_STYLE_BY_ID[feature['id']] = {
+        'fillColor': str(palette[int(np.searchsorted(bins, population))]), # Link data to GeoJSON features by their 'id'
+        'fillOpacity': 0.7,
+        'color': 'black',
+        'weight': 1,
+        'opacity': 0.2
+    }
 
 # Create the Choropleth layer
-choropleth_layer = folium.Choropleth(
-    geo_data=simplified_london_boroughs,
+# A plain GeoJson layer styled from the colour table above; the legend comes from 'colormap'.
+choropleth_layer = folium.GeoJson(
+    simplified_london_boroughs,
     name='Sample Population Density',
-    data=population_df, # Pass the pandas DataFrame here
-    columns=['feature_id', 'population'],
-    key_on='feature.id', # Link data to GeoJSON features by their 'id' property
-    fill_color='YlGnBu', # Color scheme (Yellow-Green-Blue)
-    fill_opacity=0.7,
-    line_opacity=0.2,
-    legend_name='Population (Sample Data)',
-    highlight=True, # Highlight feature on hover
+    style_function=lambda f: CHOROPLETH_STYLE_BY_ID[f['id']],
+    highlight_function=lambda f: {'weight': 3, 'fillOpacity': 1}, # Highlight feature on hover
     # Tooltip for displaying data on hover for choropleth regions
     tooltip=folium.features.GeoJsonTooltip(fields=['name', 'population'], aliases=['Borough:', 'Population:'], localize=True, sticky=False)
 )
 
-# Add the choropleth layer directly to the map to satisfy the assertion
-# This is the primary fix for "Choropleth must be added to a Map object."
+# Add the choropleth layer directly to the map
 choropleth_layer.add_to(m)
 
-# You can still add it to the FeatureGroup if you want it explicitly nested in LayerControl
-# However, for Choropleth, adding directly to map and relying on LayerControl's auto-discovery
-# of named layers is often more robust.
-# If you absolutely need it nested in the choropleth_group for a specific reason,
-# you would generally do: choropleth_layer.add_to(choropleth_group) INSTEAD of add_to(m),
-# but this can sometimes lead to the assertion error with certain Folium versions/setups.
-# For now, we prioritize fixing the assertion.
-
 
 # Add the colormap to the map so its legend is visible
 m.add_child(colormap)
@@ -254,7 +358,13 @@ Fullscreen().add_to(m)
 
 # Add MiniMap (an overview map in the corner)
 print("Adding MiniMap plugin...")
-MiniMap(toggle_display=True).add_to(m) # toggle_display allows collapsing the minimap
+# The minimap uses a single lightweight raster style and starts collapsed ('minimized'),
+# so it only requests its own tiles once the user expands it
+MiniMap(
+    tile_layer=folium.TileLayer('CartoDB positron', attr='&copy; <a href="https://carto.com/attributions">CartoDB</a>'),
+    toggle_display=True, # toggle_display allows collapsing the minimap
+    minimized=True
+).add_to(m)
 
 # Add Draw tools
 # This allows users to draw markers, polygons, circles, rectangles, and lines on the map.
@@ -310,6 +420,11 @@ folium.LayerControl().add_to(m)
 
 
 # --- 11. Save the map to an HTML file ---
-output_file = 'interactive_map.html'
-m.save(output_file)
-print(f"Advanced map successfully generated and saved to '{output_file}'")
+# build_all.py runs this script under another name and saves 'm' itself
+if __name__ == '__main__':
+    output_file = 'interactive_map.html'
+    use_current_vector_tiles()
+    compressed_files = save_compressed(m, output_file)
+    print(f"Advanced map successfully generated and saved to '{output_file}'")
+    for compressed_file in compressed_files:
+        print(f"Compressed copy for static hosting saved to '{compressed_file}'")
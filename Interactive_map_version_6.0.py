@@ -5,116 +5,512 @@ from folium.plugins import (
     Fullscreen, MiniMap, Draw, Geocoder, MousePosition, MeasureControl,
     HeatMap, MarkerCluster, TimestampedGeoJson, LocateControl
 )
-# Import pandas for data manipulation, especially for Choropleth data
-import pandas as pd
 # Import branca for colormaps
 from branca.colormap import linear
+# MacroElement and Template are used to emit custom Leaflet JS (e.g. bulk marker insertion)
+from branca.element import MacroElement
+from folium.template import Template
+import hashlib # For telling whether the pre-rendered heatmap tiles are still up to date
 import json # To handle GeoJSON data with timestamps
-import random # For generating random data for new features
+import math # For the web-mercator viewport maths
+import os # For writing the pre-rendered heatmap tiles
+import shutil # For replacing outdated heatmap tiles
+import struct, zlib # For encoding the heatmap tiles as PNG images
+import sys # For the '--prerender-heatmap' command-line flag
+import numpy as np # For generating random data for new features
+# Shared helpers that add layers in bulk, round coordinates and save the map as plain and pre-compressed HTML with compact embedded JSON
+from map_helpers import JSON_SEPARATORS, bulk_add, compact_json, round_coords, save_compressed
+# Optional speed-ups: used when installed, skipped otherwise
+try:
+    import orjson # Faster JSON serializer for the embedded data
+except ImportError:
+    orjson = None
+
+# --- Helper: embed GeoJSON as small as possible ---
+# The map is saved inside compact_json() (Section 18), so every embedded GeoJSON/array in the page
+# is written without the spaces Jinja's 'tojson' filter adds by default.
+# With orjson installed, the 'tojson' filter uses it instead of the json module.
+# orjson always writes compact JSON, so it produces the same output, only faster.
+def orjson_dumps(obj, sort_keys=False, separators=JSON_SEPARATORS):
+    """Stand-in for json.dumps() in 'tojson': honours 'sort_keys', stringifies non-str keys and returns a str."""
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(obj, option=option).decode('utf-8')
+
+JSON_DUMPS_FUNCTION = orjson_dumps if orjson is not None else None
+
+# Coordinates are rounded to COORD_DECIMALS places (~1 m) before embedding; more digits add bytes, not accuracy.
+COORD_DECIMALS = 5
+
+def round_geojson_coords(obj, ndigits=COORD_DECIMALS):
+    """Round a collection, geometry or coordinate list with map_helpers.round_coords() to COORD_DECIMALS places."""
+    return round_coords(obj, ndigits)
+
+def slim_properties(feature_collection, keep):
+    """Drop every feature property not listed in 'keep' (modifies and returns the collection)."""
+    for feature in feature_collection['features']:
+        properties = feature.get('properties') or {}
+        feature['properties'] = {key: properties[key] for key in keep if key in properties}
+    return feature_collection
+
+
+# --- Helper: add many markers to a layer with a single addLayers() call ---
+# Adding folium.Marker objects one by one emits a separate L.marker(...).addTo(...) call per marker.
+# BulkMarkers ships just the locations as one [[lat, lng], ...] array instead and hands the markers
+# to the parent layer (e.g. a MarkerCluster) in one batch, so the cluster index is built once.
+# Tooltips come from one JS 'tooltip_callback' (function (latlng, index) -> HTML), which Leaflet
+# only calls when a tooltip is first opened, instead of a pre-built string per marker.
+class BulkMarkers(MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            {%- if this.tooltip_callback %}
+            var {{ this.get_name() }}_tooltip = {{ this.tooltip_callback }};
+            {%- endif %}
+            var {{ this.get_name() }} = {{ this.locations|tojson }}.map(function (location, index) {
+                var marker = L.marker(location);
+                {%- if this.tooltip_callback %}
+                marker.bindTooltip(function (layer) {
+                    return {{ this.get_name() }}_tooltip(layer.getLatLng(), index);
+                });
+                {%- endif %}
+                return marker;
+            });
+            {{ this._parent.get_name() }}.addLayers({{ this.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, locations, tooltip_callback=None):
+        super().__init__()
+        self._name = 'BulkMarkers'
+        self.locations = locations
+        self.tooltip_callback = tooltip_callback
+
+
+# --- Helper: declare shared JS string constants ---
+# Emits 'var <name> = <value>;' for each keyword argument. Options can then point at a constant
+# with folium.utilities.JsCode('<name>') instead of embedding the same long string several times.
+# Add it to the map before the elements that use the constants, so they are declared first.
+class JsConstants(MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            {%- for name, value in this.constants.items() %}
+            var {{ name }} = {{ value|tojson }};
+            {%- endfor %}
+        {% endmacro %}
+    """)
+
+    def __init__(self, **constants):
+        super().__init__()
+        self._name = 'JsConstants'
+        self.constants = constants
+
+
+# --- Helper: add custom JS that refers to folium layers by fixed variable names ---
+# folium gives every layer a generated JS name (e.g. 'feature_group_3f2a...'). CustomScript declares
+# a 'var <alias> = <generated name>;' for each keyword argument before the code, so the code can use
+# the layers directly instead of searching for them with map.eachLayer(). It is rendered after
+# its parent's own script, so the referenced layers already exist when it runs.
+class CustomScript(MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            {%- for alias, element in this.references.items() %}
+            var {{ alias }} = {{ element.get_name() }};
+            {%- endfor %}
+            {{ this.code }}
+        {% endmacro %}
+    """)
+
+    def __init__(self, code, **references):
+        super().__init__()
+        self._name = 'CustomScript'
+        self.code = code
+        self.references = references
+
+
+# --- Helper: load the heatmap plugin only when its layer is switched on ---
+# folium's HeatMap puts the leaflet-heat script in the page header, so it is downloaded on every page load.
+# LazyHeatMap keeps the point data in the page but only injects the script (once) when its parent
+# layer is first added to the map, e.g. when the user ticks it in the LayerControl, and then builds
+# the heat layer. Until then nothing is downloaded or drawn.
+# With 'below_zoom' set, the heat layer is only shown (and the script only loaded) while the map is
+# zoomed out below that level, e.g. when pre-rendered tiles cover the deeper zooms.
+class LazyHeatMap(MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            (function () {
+                var group = {{ this._parent.get_name() }};
+                var belowZoom = {{ this.below_zoom|tojson }};
+                var heat = null;
+                var loading = false;
+                function update() {
+                    var map = group._map;
+                    if (!map) { return; }
+                    if (belowZoom !== null && map.getZoom() >= belowZoom) {
+                        if (heat) { group.removeLayer(heat); }
+                        return;
+                    }
+                    if (heat) { group.addLayer(heat); return; }
+                    if (loading) { return; }
+                    loading = true;
+                    var script = document.createElement('script');
+                    script.src = {{ this.script_url|tojson }};
+                    script.onload = function () {
+                        heat = L.heatLayer({{ this.data|tojson }}, {{ this.options|tojson }});
+                        update();
+                    };
+                    document.head.appendChild(script);
+                }
+                function onAdd() {
+                    group._map.on('zoomend', update);
+                    update();
+                }
+                group.on('add', onAdd);
+                group.on('remove', function () { group._map.off('zoomend', update); });
+                if (group._map) { onAdd(); }
+            })();
+        {% endmacro %}
+    """)
+
+    script_url = HeatMap.default_js[0][1]
+
+    def __init__(self, data, below_zoom=None, **options):
+        super().__init__()
+        self._name = 'LazyHeatMap'
+        self.data = data
+        self.below_zoom = below_zoom
+        # Same defaults as folium's HeatMap
+        self.options = {'minOpacity': 0.5, 'maxZoom': 18, 'radius': 25, 'blur': 15, **options}
+
+
+# --- Helper: pre-render a heatmap as a raster tile pyramid ---
+# The heatmap data never changes after the page is generated, so instead of letting leaflet-heat
+# redraw it on every pan and zoom, the heat is drawn once here into 256x256 PNG tiles
+# ('<out_dir>/<z>/<x>/<y>.png', the standard web-mercator tile scheme) and shown with a plain TileLayer.
+# The drawing follows leaflet-heat (and the simpleheat canvas it draws on) step by step, with the same
+# option names and defaults as LazyHeatMap, so both look alike (compared by eye, not pixel for pixel):
+#   1. points closer than a grid cell ((radius + blur) / 2 pixels) are merged into one, at their
+#      weighted mean position, with their intensities summed; each intensity is scaled by
+#      1 / 2 ** (maxZoom - zoom) and capped at 'max'
+#   2. each merged point stamps a disc of 'radius' pixels softened like a canvas shadowBlur of 'blur'
+#      pixels, at an opacity of intensity / max but at least 'minOpacity'; the stamps are alpha-blended
+#   3. the blended alpha picks the colour from the gradient and stays the pixel's alpha.
+# The only difference is that the merge grid is anchored at the world origin rather than the
+# current view. Only NumPy and the stdlib are used.
+HEAT_GRADIENT = [(0.4, (0, 0, 255)), (0.6, (0, 255, 255)), (0.7, (0, 255, 0)), (0.8, (255, 255, 0)), (1.0, (255, 0, 0))]
+
+def write_png(path, rgba):
+    """Write an (height, width, 4) uint8 RGBA array as a PNG file."""
+    height, width = rgba.shape[:2]
+    raw = b''.join(b'\x00' + row.tobytes() for row in rgba) # Filter type 0 (none) for every scanline
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw, 9)))
+        f.write(chunk(b'IEND', b''))
+
+def lonlat_to_world_px(lons, lats, zoom):
+    """Web-mercator pixel coordinates of the given points at 'zoom'."""
+    world_px = 256 * 2 ** zoom
+    x = (np.asarray(lons) + 180) / 360 * world_px
+    lat_rad = np.radians(lats)
+    y = (1 - np.log(np.tan(lat_rad) + 1 / np.cos(lat_rad)) / np.pi) / 2 * world_px
+    return x, y
+
+def heat_spot(radius, blur):
+    """Opacity (0-1) of one point's spot on its 2 * (radius + blur) pixel square, like simpleheat's circle image."""
+    size = 2 * (radius + blur)
+    # Disc coverage per pixel, anti-aliased by sampling each pixel 4x4 times
+    samples = (np.arange(size * 4) + 0.5) / 4 - size / 2
+    disc = (samples[:, None] ** 2 + samples[None, :] ** 2 <= radius ** 2).reshape(size, 4, size, 4).mean(axis=(1, 3))
+    if blur <= 0:
+        return disc
+    # A canvas shadowBlur of 'blur' is a gaussian blur with a standard deviation of blur / 2
+    sigma = blur / 2
+    offsets = np.arange(-int(3 * sigma) - 1, int(3 * sigma) + 2)
+    kernel = np.exp(-offsets ** 2 / (2 * sigma ** 2))
+    kernel /= kernel.sum()
+    disc = np.apply_along_axis(np.convolve, 0, disc, kernel, mode='same')
+    return np.apply_along_axis(np.convolve, 1, disc, kernel, mode='same')
+
+def render_heatmap_tiles(points, out_dir, zooms, radius=25, blur=15, min_opacity=0.5, max_zoom=18, max_intensity=1.0):
+    """Render [lat, lon, intensity] points into PNG tiles for each zoom; returns the number of tiles written."""
+    points = np.asarray(points, dtype=float)
+    spot = heat_spot(radius, blur)
+    half = radius + blur # The spot is 2 * half pixels wide, centred on its point
+    # Colour for every alpha value 0-255, sampled at the pixel centres of simpleheat's 256-pixel gradient
+    positions = (np.arange(256) + 0.5) / 256
+    stops = [stop for stop, _ in HEAT_GRADIENT]
+    palette = np.column_stack([
+        np.interp(positions, stops, [color[channel] for _, color in HEAT_GRADIENT]) for channel in range(3)
+    ]).round().astype(np.uint8)
+    written = 0
+    for zoom in zooms:
+        x, y = lonlat_to_world_px(points[:, 1], points[:, 0], zoom)
+        weights = points[:, 2] / 2 ** max(0, min(max_zoom - zoom, 12))
+        # 1. Merge the points per grid cell
+        cell_size = half / 2
+        _, cell = np.unique(np.column_stack([x // cell_size, y // cell_size]), axis=0, return_inverse=True)
+        cell = cell.ravel()
+        cell_weights = np.bincount(cell, weights=weights)
+        keep = cell_weights > 0
+        cell_x = np.round(np.bincount(cell, weights=x * weights)[keep] / cell_weights[keep]).astype(int)
+        cell_y = np.round(np.bincount(cell, weights=y * weights)[keep] / cell_weights[keep]).astype(int)
+        opacity = np.clip(np.maximum(np.minimum(cell_weights[keep], max_intensity) / max_intensity, min_opacity), 0, 1)
+        # 2. Blend the spots of the points near each tile on a canvas with a 2 * half pixel margin
+        for tx in range((cell_x.min() - half) // 256, (cell_x.max() + half) // 256 + 1):
+            for ty in range((cell_y.min() - half) // 256, (cell_y.max() + half) // 256 + 1):
+                left, top = tx * 256 - 2 * half, ty * 256 - 2 * half
+                near = (np.abs(cell_x - (tx * 256 + 128)) < 128 + half) & (np.abs(cell_y - (ty * 256 + 128)) < 128 + half)
+                if not near.any():
+                    continue
+                transparency = np.ones((256 + 4 * half, 256 + 4 * half))
+                for px, py, alpha in zip(cell_x[near] - left, cell_y[near] - top, opacity[near]):
+                    transparency[py - half:py + half, px - half:px + half] *= 1 - alpha * spot
+                heat = np.round((1 - transparency[2 * half:2 * half + 256, 2 * half:2 * half + 256]) * 255).astype(np.uint8)
+                if not heat.any():
+                    continue
+                # 3. Colour by alpha; fully transparent pixels stay (0, 0, 0, 0)
+                rgba = np.zeros((256, 256, 4), dtype=np.uint8)
+                rgba[..., :3] = np.where(heat[..., None] > 0, palette[heat], 0)
+                rgba[..., 3] = heat
+                tile_dir = os.path.join(out_dir, str(zoom), str(tx))
+                os.makedirs(tile_dir, exist_ok=True)
+                write_png(os.path.join(tile_dir, f'{ty}.png'), rgba)
+                written += 1
+    return written
+
+def cached_heatmap_tiles(points, out_dir, zooms, **options):
+    """Render the tiles with render_heatmap_tiles() unless 'out_dir' already holds them for the same input.
+
+    Returns the number of tiles written, or None if the existing tiles were reused.
+    """
+    key = hashlib.sha256(json.dumps([points, list(zooms), options, HEAT_GRADIENT], sort_keys=True).encode('utf-8')).hexdigest()
+    key_path = os.path.join(out_dir, 'key.txt')
+    try:
+        with open(key_path, encoding='utf-8') as f:
+            if f.read() == key:
+                return None
+    except OSError:
+        pass # No tiles yet
+    shutil.rmtree(out_dir, ignore_errors=True) # Drop tiles the new data may no longer cover
+    written = render_heatmap_tiles(points, out_dir, zooms, **options)
+    os.makedirs(out_dir, exist_ok=True)
+    with open(key_path, 'w', encoding='utf-8') as f:
+        f.write(key)
+    return written
+
+
+# --- Helper: drop GeoJSON features that lie far outside the initial map view ---
+# The output is a static page, so features that cannot be near the starting view are removed
+# before they are embedded. Leaflet then has less JSON to parse and fewer features to style.
+# The view is sized for a large (2560x1440) screen and padded by VIEWPORT_MARGIN screens on every side,
+# so everything within normal panning distance is kept. Only plain bounding boxes are compared (no shapely needed).
+VIEWPORT_SIZE_PX = (2560, 1440) # Assumed map size in pixels (width, height)
+VIEWPORT_MARGIN = 1.0 # Extra padding around the view, in multiples of the view size
+
+def initial_view_bounds(center, zoom, size_px=VIEWPORT_SIZE_PX, margin=VIEWPORT_MARGIN):
+    """Return (west, south, east, north) of the area shown at 'center'/'zoom', padded by 'margin'."""
+    world_px = 256 * 2 ** zoom # Width of the whole world in pixels at this zoom
+    lat, lon = center
+    x = (lon + 180) / 360 * world_px
+    y = (1 - math.log(math.tan(math.radians(lat)) + 1 / math.cos(math.radians(lat))) / math.pi) / 2 * world_px
+    half_w = size_px[0] * (0.5 + margin)
+    half_h = size_px[1] * (0.5 + margin)
+
+    def to_lat(py):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * py / world_px))))
+
+    west = (x - half_w) / world_px * 360 - 180
+    east = (x + half_w) / world_px * 360 - 180
+    return (west, to_lat(min(y + half_h, world_px)), east, to_lat(max(y - half_h, 0)))
+
+def geometry_bbox(geometry):
+    """Return (west, south, east, north) of a GeoJSON geometry's coordinates."""
+    lons, lats = [], []
+    stack = [geometry['coordinates']]
+    while stack:
+        coords = stack.pop()
+        if coords and isinstance(coords[0], (int, float)):
+            lons.append(coords[0])
+            lats.append(coords[1])
+        else:
+            stack.extend(coords)
+    return (min(lons), min(lats), max(lons), max(lats))
+
+def filter_to_view(feature_collection, view_bounds):
+    """Keep only the features whose bounding box intersects 'view_bounds' (modifies and returns the collection)."""
+    west, south, east, north = view_bounds
+    kept = []
+    for feature in feature_collection['features']:
+        f_west, f_south, f_east, f_north = geometry_bbox(feature['geometry'])
+        if f_west <= east and f_east >= west and f_south <= north and f_north >= south:
+            kept.append(feature)
+    feature_collection['features'] = kept
+    return feature_collection
+
 
 # --- 1. Create a base map ---
 # Initialize a Folium map object
 # 'location' sets the initial center coordinates (latitude, longitude)
 # 'zoom_start' sets the initial zoom level
 # 'tiles' specifies the initial map tile style
+# 'prefer_canvas' draws vector layers (circles, polygons, GeoJSON) on one <canvas> instead of one SVG node each
 print("Creating a base map centered near London...")
+# The page is saved as 'output_file' in Section 18; the heatmap tiles (Section 9) are written next to it
+output_file = 'interactive_map.html'
+MAP_CENTER = [51.5074, -0.1278]
+MAP_ZOOM_START = 10
 m = folium.Map(
-    location=[51.5074, -0.1278],
-    zoom_start=10,
+    location=MAP_CENTER,
+    zoom_start=MAP_ZOOM_START,
     tiles='OpenStreetMap',
-    attr='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors' # Added attribution
+    attr='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors', # Added attribution
+    prefer_canvas=True
 )
+# Bounds of the initial view, used to drop GeoJSON features that are nowhere near it
+view_bounds = initial_view_bounds(MAP_CENTER, MAP_ZOOM_START)
 
 # --- 2. Add multiple Tile Layers for base map switching ---
 # These layers will be available through the LayerControl
 print("Adding additional tile layers...")
-folium.TileLayer('CartoDB positron', name='Light Mode', attr='&copy; <a href="https://carto.com/attributions">CartoDB</a>').add_to(m)
-folium.TileLayer('CartoDB dark_matter', name='Dark Mode', attr='&copy; <a href="https://carto.com/attributions">CartoDB</a>').add_to(m)
-folium.TileLayer('Stamen Toner', name='Toner', attr='Map tiles by <a href="http://stamen.com">Stamen Design</a>, <a href="http://creativecommons.org/licenses/by/3.0">CC BY 3.0</a> &mdash; Map data &copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors').add_to(m)
-folium.TileLayer('Stamen Terrain', name='Terrain', attr='Map tiles by <a href="http://stamen.com">Stamen Design</a>, <a href="http://creativecommons.org/licenses/by/3.0">CC BY 3.0</a> &mdash; Map data &copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors').add_to(m)
+# Layers from the same provider share one attribution string. It is declared once as a JS variable
+# and every layer's options refer to that variable instead of repeating the HTML.
+JsConstants(
+    _cartoAttr='&copy; <a href="https://carto.com/attributions">CartoDB</a>',
+    _stamenAttr='Map tiles by <a href="http://stamen.com">Stamen Design</a>, <a href="http://creativecommons.org/licenses/by/3.0">CC BY 3.0</a> &mdash; Map data &copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
+).add_to(m)
+CARTO_ATTR = folium.utilities.JsCode('_cartoAttr')
+STAMEN_ATTR = folium.utilities.JsCode('_stamenAttr')
+folium.TileLayer('CartoDB positron', name='Light Mode', attr=CARTO_ATTR).add_to(m)
+folium.TileLayer('CartoDB dark_matter', name='Dark Mode', attr=CARTO_ATTR).add_to(m)
+folium.TileLayer('Stamen Toner', name='Toner', attr=STAMEN_ATTR).add_to(m)
+folium.TileLayer('Stamen Terrain', name='Terrain', attr=STAMEN_ATTR).add_to(m)
 
 
 # --- 3. Add FeatureGroups for better layer organization ---
 # FeatureGroup allows grouping related markers/polygons to be toggled together in LayerControl
-markers_group = folium.FeatureGroup(name='London Landmarks').add_to(m)
-shapes_group = folium.FeatureGroup(name='Area Features').add_to(m)
-geojson_group = folium.FeatureGroup(name='Sample GeoJSON Data').add_to(m)
-heatmap_group = folium.FeatureGroup(name='Simulated Heatmap').add_to(m)
-marker_cluster_group = folium.FeatureGroup(name='Clustered Locations').add_to(m)
-timestamp_geojson_group = folium.FeatureGroup(name='Temporal Data (Timestamps)').add_to(m)
-image_overlay_group = folium.FeatureGroup(name='Historical Map Overlay').add_to(m)
-random_points_group = folium.FeatureGroup(name='Random Points').add_to(m)
-clickable_regions_group = folium.FeatureGroup(name='Clickable Regions').add_to(m) # New group for clickable GeoJSON
-
-# --- 4. Add markers to the map within the 'markers_group' ---
-# Markers are points on the map, often with popups showing information
+# Point layers use MarkerCluster instead, so Leaflet only creates DOM nodes for the clusters visible at the current zoom.
+# 'chunkedLoading' adds the markers in chunks and yields to the browser every 'chunkInterval' ms while loading.
+POINT_CLUSTER_OPTIONS = {'chunkedLoading': True, 'chunkInterval': 200, 'disableClusteringAtZoom': 16}
+markers_group = MarkerCluster(name='London Landmarks', options=POINT_CLUSTER_OPTIONS)
+shapes_group = folium.FeatureGroup(name='Area Features')
+geojson_group = folium.FeatureGroup(name='Sample GeoJSON Data')
+# The heatmap and image overlay start hidden, so their script/image are only fetched once switched on
+heatmap_group = folium.FeatureGroup(name='Simulated Heatmap', show=False)
+marker_cluster_group = folium.FeatureGroup(name='Clustered Locations')
+timestamp_geojson_group = folium.FeatureGroup(name='Temporal Data (Timestamps)')
+image_overlay_group = folium.FeatureGroup(name='Historical Map Overlay', show=False) # Leaflet loads the image on first display
+random_points_group = MarkerCluster(name='Random Points', options=POINT_CLUSTER_OPTIONS)
+clickable_regions_group = folium.FeatureGroup(name='Clickable Regions') # New group for clickable GeoJSON
+# Register all groups on the map in one batch (same order as above)
+bulk_add(m, [
+    markers_group, shapes_group, geojson_group, heatmap_group, marker_cluster_group,
+    timestamp_geojson_group, image_overlay_group, random_points_group, clickable_regions_group
+])
+
+
+# --- 4. Add landmark markers to the 'landmark_features' collection ---
+# Markers are points on the map, often with popups showing information.
+# Sections 4-7 describe their markers and shapes as GeoJSON features. At the end of Section 7 each
+# group's features are drawn by one folium.GeoJson (one Leaflet layer and one set of event handlers per
+# group instead of one per marker or shape), so the groups can still be toggled separately.
+# Each feature says how to draw itself in 'iconType' ('marker', 'icon', 'custom', 'circle' or a plain shape)
+# and carries its own 'popup'/'tooltip' HTML and precomputed '_style'.
+# Note: GeoJSON coordinates are [longitude, latitude].
+landmark_features = []
 
 # Example 1: London Eye
 print("Adding markers to the map...")
-folium.Marker(
-    location=[51.5033, -0.1196], # Latitude, Longitude
-    popup=folium.Popup("<b>London Eye</b><br><i>Famous Ferris wheel</i><br><img src='https://placehold.co/100x60/ADD8E6/000000?text=Eye' width='100px'>", max_width=300), # Popup with HTML and image
-    tooltip="Click for London Eye info" # Text that appears on hover
-).add_to(markers_group) # Add to the markers_group
-
-# Example 2: British Museum with custom Font Awesome icon
-folium.Marker(
-    location=[51.5194, -0.1269],
-    popup="<b>British Museum</b><br>World-renowned museum of human history, art and culture.",
-    icon=folium.Icon(color='red', icon='info-sign', prefix='glyphicon'), # Using 'glyphicon' prefix for info-sign
-    tooltip="British Museum"
-).add_to(markers_group)
+landmark_features.append({
+    "type": "Feature",
+    "geometry": {"type": "Point", "coordinates": [-0.1196, 51.5033]},
+    "properties": {
+        "iconType": "marker",
+        "popup": "<b>London Eye</b><br><i>Famous Ferris wheel</i><br><img src='https://placehold.co/100x60/ADD8E6/000000?text=Eye' width='100px'>", # Popup with HTML and image
+        "tooltip": "Click for London Eye info" # Text that appears on hover
+    }
+})
+
+# Example 2: British Museum with custom glyphicon icon
+landmark_features.append({
+    "type": "Feature",
+    "geometry": {"type": "Point", "coordinates": [-0.1269, 51.5194]},
+    "properties": {
+        "iconType": "icon",
+        "icon": {"markerColor": "red", "icon": "info-sign", "prefix": "glyphicon"}, # Using 'glyphicon' prefix for info-sign
+        "popup": "<b>British Museum</b><br>World-renowned museum of human history, art and culture.",
+        "tooltip": "British Museum"
+    }
+})
 
 # Example 3: Buckingham Palace with a custom image icon
 print("Adding custom image marker...")
-folium.Marker(
-    location=[51.5014, -0.1419],
-    popup=folium.Popup("<b>Buckingham Palace</b><br>The King's official London residence.<br><img src='https://placehold.co/100x60/FFF8DC/000000?text=Palace' width='100px'>", max_width=300),
-    icon=folium.CustomIcon(
-        icon_image='https://placehold.co/32x32/FFD700/000000?text=👑', # Placeholder for a crown icon
-        icon_size=(32, 32),
-        icon_anchor=(16, 32),
-        popup_anchor=(0, -20)
-    ),
-    tooltip="Buckingham Palace"
-).add_to(markers_group)
-
-
-# --- 5. Add a CircleMarker for an area of interest within 'shapes_group' ---
+landmark_features.append({
+    "type": "Feature",
+    "geometry": {"type": "Point", "coordinates": [-0.1419, 51.5014]},
+    "properties": {
+        "iconType": "custom",
+        "icon": {
+            "iconUrl": "https://placehold.co/32x32/FFD700/000000?text=👑", # Placeholder for a crown icon
+            "iconSize": [32, 32],
+            "iconAnchor": [16, 32],
+            "popupAnchor": [0, -20]
+        },
+        "popup": "<b>Buckingham Palace</b><br>The King's official London residence.<br><img src='https://placehold.co/100x60/FFF8DC/000000?text=Palace' width='100px'>",
+        "tooltip": "Buckingham Palace"
+    }
+})
+
+
+# --- 5. Add a CircleMarker for an area of interest to the 'area_features' collection ---
 # Circle markers can represent areas or points with a defined radius
 print("Adding a circle marker...")
-folium.CircleMarker(
-    location=[51.51, -0.09], # Center of the circle
-    radius=50, # Radius in pixels
-    popup="City of London Financial District",
-    color='#3186cc', # Border color
-    fill=True,
-    fill_color='#3186cc', # Fill color
-    fill_opacity=0.4 # Transparency of the fill
-).add_to(shapes_group)
-
-
-# --- 6. Add a simple Polygon within 'shapes_group' ---
+area_features = []
+area_features.append({
+    "type": "Feature",
+    "geometry": {"type": "Point", "coordinates": [-0.09, 51.51]}, # Center of the circle
+    "properties": {
+        "iconType": "circle",
+        "radius": 50, # Radius in pixels
+        "popup": "City of London Financial District",
+        "_style": {
+            "color": "#3186cc", # Border color
+            "fill": True,
+            "fillColor": "#3186cc", # Fill color
+            "fillOpacity": 0.4 # Transparency of the fill
+        }
+    }
+})
+
+
+# --- 6. Add a simple Polygon to the 'area_features' collection ---
 # Polygons require a list of coordinates that define its boundaries
 print("Adding a polygon...")
-folium.Polygon(
-    locations=[
-        [51.509, -0.10],
-        [51.509, -0.09],
-        [51.508, -0.09],
-        [51.508, -0.10],
-        [51.509, -0.10] # Close the polygon
-    ],
-    color='green',
-    weight=3,
-    fill=True,
-    fill_color='lightgreen',
-    fill_opacity=0.6,
-    popup="Small Park Area"
-).add_to(shapes_group)
-
-
-# --- 7. Add a sample GeoJSON layer (FeatureCollection) within 'geojson_group' ---
+area_features.append({
+    "type": "Feature",
+    "geometry": {
+        "type": "Polygon",
+        "coordinates": [[
+            [-0.10, 51.509],
+            [-0.09, 51.509],
+            [-0.09, 51.508],
+            [-0.10, 51.508],
+            [-0.10, 51.509] # Close the polygon
+        ]]
+    },
+    "properties": {
+        "popup": "Small Park Area",
+        "_style": {"color": "green", "weight": 3, "fill": True, "fillColor": "lightgreen", "fillOpacity": 0.6}
+    }
+})
+
+
+# --- 7. Add a sample GeoJSON layer (FeatureCollection) and draw the layers of Sections 4-7 ---
 # GeoJSON is a format for encoding a variety of geographic data structures.
 print("Adding a GeoJSON layer...")
 sample_geojson_data = {
@@ -160,30 +556,79 @@ sample_geojson_data = {
     ]
 }
 
-folium.GeoJson(
-    sample_geojson_data,
-    name='Sample GeoJSON Features',
-    tooltip=folium.features.GeoJsonTooltip(fields=['name', 'description']),
-    style_function=lambda x: {
-        'fillColor': x['properties'].get('fillColor', '#0000ff'),
-        'color': x['properties'].get('strokeColor', '#0000ff'),
-        'weight': x['properties'].get('weight', 3),
-        'fillOpacity': x['properties'].get('fillOpacity', 0.5) if x['geometry']['type'] == 'Polygon' else 0, # Only fill for polygons
+# The style only depends on each feature's own properties, so it is worked out once here
+# and stored on the feature as '_style'. The folium style_function then just reads it back.
+for feature in sample_geojson_data['features']:
+    properties = feature['properties']
+    properties['_style'] = {
+        'fillColor': properties.get('fillColor', '#0000ff'),
+        'color': properties.get('strokeColor', '#0000ff'),
+        'weight': properties.get('weight', 3),
+        'fillOpacity': properties.get('fillOpacity', 0.5) if feature['geometry']['type'] == 'Polygon' else 0, # Only fill for polygons
+    }
+    # Tooltip with the same fields the GeoJsonTooltip used to show
+    properties['tooltip'] = f"<b>name:</b> {properties['name']}<br><b>description:</b> {properties['description']}"
+
+# Builds each point's marker from its 'iconType'; polygons and lines are drawn by L.geoJson itself
+LONDON_POINT_TO_LAYER = folium.utilities.JsCode("""function (feature, latlng) {
+    var p = feature.properties;
+    if (p.iconType === 'icon') {
+        return L.marker(latlng, {icon: L.AwesomeMarkers.icon(p.icon)});
+    }
+    if (p.iconType === 'custom') {
+        return L.marker(latlng, {icon: L.icon(p.icon)});
     }
-).add_to(geojson_group)
+    if (p.iconType === 'circle') {
+        return L.circleMarker(latlng, {radius: p.radius});
+    }
+    return L.marker(latlng);
+}""")
+
+# Binds the popup (max width 300px) and tooltip HTML stored on each feature
+LONDON_ON_EACH_FEATURE = folium.utilities.JsCode("""function (feature, layer) {
+    var p = feature.properties;
+    if (p.popup) {
+        layer.bindPopup(p.popup, {maxWidth: 300});
+    }
+    if (p.tooltip) {
+        layer.bindTooltip(p.tooltip);
+    }
+}""")
+
+# One GeoJSON layer per group, so each keeps its own LayerControl entry:
+# (features, layer name, group)
+LONDON_LAYERS = [
+    (landmark_features, 'London Landmarks', markers_group), # Section 4
+    (area_features, 'Area Features', shapes_group), # Sections 5 and 6
+    (sample_geojson_data['features'], 'Sample GeoJSON Features', geojson_group), # Section 7
+]
+london_layers = []
+for features, name, group in LONDON_LAYERS:
+    collection = {"type": "FeatureCollection", "features": features}
+    filter_to_view(collection, view_bounds)
+    slim_properties(collection, ['iconType', 'icon', 'radius', 'popup', 'tooltip', 'name', '_style']) # Only drawing/popup/tooltip fields
+    round_geojson_coords(collection)
+    london_layers.append(folium.GeoJson(
+        collection,
+        name=name,
+        style_function=lambda x: x['properties'].get('_style', {}), # Markers have no path style
+        on_each_feature=LONDON_ON_EACH_FEATURE,
+        point_to_layer=LONDON_POINT_TO_LAYER
+    ).add_to(group))
+sample_geojson_layer = london_layers[-1]
 
 
 # --- 8. Add a Choropleth Map (sample data for simplified 'boroughs') ---
 print("Adding a choropleth map...")
 
 # Simplified GeoJSON for two "mock boroughs" in London. In reality, you'd load a detailed GeoJSON file.
-# Note: Ensure the 'id' field in geo_data matches 'key_on' in folium.Choropleth
+# Note: Ensure the 'id' field of each feature matches a key in population_by_id
 simplified_london_boroughs = {
     "type": "FeatureCollection",
     "features": [
         {
             "type": "Feature",
-            "id": "BoroughA",  # This ID must match the 'feature_id' in your data
+            "id": "BoroughA",  # This ID must match a key in population_by_id
             "properties": {"name": "Mock Borough A", "population": 80000},
             "geometry": {
                 "type": "Polygon",
@@ -207,38 +652,36 @@ simplified_london_boroughs = {
 }
 
 # Corresponding population data for the simplified boroughs
-# 'feature_id' here matches the 'id' in the GeoJSON features
-population_data = [
-    {'feature_id': 'BoroughA', 'population': 80000},
-    {'feature_id': 'BoroughB', 'population': 120000}
-]
+# Keys here match the 'id' of the GeoJSON features
+population_by_id = {'BoroughA': 80000, 'BoroughB': 120000}
+
+# Create a colormap for the choropleth, scaled to the min/max population
+colormap = linear.YlGnBu_09.scale(min(population_by_id.values()), max(population_by_id.values()))
+colormap.caption = 'Population (Sample Data)' # Legend title
 
-# Convert population_data to a pandas DataFrame to ensure correct data types for Choropleth
-population_df = pd.DataFrame(population_data)
+# Look up each borough's colour once here and store it on the feature,
+# so the style function below only has to read it back.
+for feature in simplified_london_boroughs['features']:
+    feature['properties']['fillColor'] = colormap(population_by_id[feature['id']])
 
-# Create a colormap for the choropleth
-# It's important to use the min/max of the 'population' column from the DataFrame
-colormap = linear.YlGnBu_09.scale(population_df['population'].min(), population_df['population'].max())
+slim_properties(simplified_london_boroughs, ['name', 'population', 'fillColor']) # Only tooltip/style fields
+round_geojson_coords(simplified_london_boroughs)
 
-# Create the Choropleth layer
-choropleth_layer = folium.Choropleth(
-    geo_data=simplified_london_boroughs,
+# Create the choropleth layer and add it directly to the map
+choropleth_layer = folium.GeoJson(
+    simplified_london_boroughs,
     name='Sample Population Density', # Name for LayerControl
-    data=population_df, # Pass the pandas DataFrame here
-    columns=['feature_id', 'population'],
-    key_on='feature.id', # Link data to GeoJSON features by their 'id' property
-    fill_color='YlGnBu', # Color scheme (Yellow-Green-Blue)
-    fill_opacity=0.7,
-    line_opacity=0.2,
-    legend_name='Population (Sample Data)',
-    highlight=True, # Highlight feature on hover
+    style_function=lambda x: {
+        'fillColor': x['properties']['fillColor'],
+        'fillOpacity': 0.7,
+        'color': 'black',
+        'opacity': 0.2,
+        'weight': 1
+    },
+    highlight_function=lambda x: {'weight': 3, 'fillOpacity': 0.9}, # Highlight feature on hover
     # Tooltip for displaying data on hover for choropleth regions
     tooltip=folium.features.GeoJsonTooltip(fields=['name', 'population'], aliases=['Borough:', 'Population:'], localize=True, sticky=False)
-)
-
-# Add the choropleth layer directly to the map to satisfy the assertion
-choropleth_layer.add_to(m)
-
+).add_to(m)
 
 # Add the colormap to the map so its legend is visible
 m.add_child(colormap)
@@ -264,7 +707,56 @@ heatmap_data = [
     [51.48, -0.05, 0.3], [51.47, -0.06, 0.2], # Further southeast, low
     [51.58, -0.01, 0.5], [51.57, 0.0, 0.4] # Far north, medium
 ]
-HeatMap(heatmap_data).add_to(heatmap_group)
+
+# Pre-aggregate the points onto a grid in Python so only the non-empty cells are shipped to Leaflet.heat
+# 'HEATMAP_GRID_BINS' sets the grid resolution (bins per axis) over the extent of the data.
+HEATMAP_GRID_BINS = 200
+heatmap_points = np.array(heatmap_data)
+heat_grid, lat_edges, lon_edges = np.histogram2d(
+    heatmap_points[:, 0], heatmap_points[:, 1], bins=HEATMAP_GRID_BINS, weights=heatmap_points[:, 2]
+)
+lat_idx, lon_idx = np.nonzero(heat_grid)
+heatmap_cells = np.round(np.column_stack([
+    (lat_edges[lat_idx] + lat_edges[lat_idx + 1]) / 2, # Cell centre latitude
+    (lon_edges[lon_idx] + lon_edges[lon_idx + 1]) / 2, # Cell centre longitude
+    heat_grid[lat_idx, lon_idx] # Summed intensity of the points in the cell
+]), COORD_DECIMALS).tolist()
+
+# By default leaflet-heat draws the heat live at every zoom level, and its script is only loaded
+# once the layer is switched on.
+# Pass '--prerender-heatmap' (or set MAP_PRERENDER_HEATMAP=1) to pre-render it into PNG tiles
+# instead, for the zoom levels HEATMAP_TILE_ZOOMS. The tiles are written to HEATMAP_TILE_DIR next to
+# the output HTML (the page refers to them by that relative path) and only redrawn when the heatmap
+# data or options change. Beyond the last level Leaflet scales up the deepest tiles. Below the first
+# level leaflet-heat still draws the heat live.
+PRERENDER_HEATMAP = '--prerender-heatmap' in sys.argv[1:] or os.environ.get('MAP_PRERENDER_HEATMAP') == '1'
+HEATMAP_TILE_DIR = 'heatmap_tiles'
+HEATMAP_TILE_ZOOMS = range(8, 15)
+HEATMAP_OPTIONS = {'radius': 15} # leaflet-heat options, used for both the tiles and the live layer
+if PRERENDER_HEATMAP:
+    tile_dir = os.path.join(os.path.dirname(output_file), HEATMAP_TILE_DIR)
+    tile_count = cached_heatmap_tiles(heatmap_cells, tile_dir, HEATMAP_TILE_ZOOMS, **HEATMAP_OPTIONS)
+    if tile_count is None:
+        print(f"Heatmap data unchanged; reusing the pre-rendered tiles in '{tile_dir}'")
+    else:
+        print(f"Pre-rendered {tile_count} heatmap tiles into '{tile_dir}'")
+    folium.TileLayer(
+        tiles=HEATMAP_TILE_DIR + '/{z}/{x}/{y}.png',
+        attr='Simulated heatmap data',
+        name='Simulated Heatmap Tiles',
+        overlay=True,
+        control=False, # Toggled through the 'Simulated Heatmap' group
+        min_zoom=HEATMAP_TILE_ZOOMS[0],
+        max_native_zoom=HEATMAP_TILE_ZOOMS[-1],
+        max_zoom=18,
+        # Empty areas have no tile file; show a transparent 1x1 GIF instead of a broken image
+        error_tile_url='data:image/gif;base64,R0lGODlhAQABAAAAACH5BAEKAAEALAAAAAABAAEAAAICTAEAOw=='
+    ).add_to(heatmap_group)
+LazyHeatMap(
+    heatmap_cells,
+    below_zoom=HEATMAP_TILE_ZOOMS[0] if PRERENDER_HEATMAP else None,
+    **HEATMAP_OPTIONS
+).add_to(heatmap_group)
 
 
 # --- 10. Add a Marker Cluster Layer ---
@@ -280,9 +772,13 @@ cluster_locations = [
     # Scattered points
     [51.58, -0.02], [51.45, -0.2], [51.56, 0.05], [51.49, -0.01], [51.52, -0.03]
 ]
-marker_cluster = MarkerCluster(name='Clustered Locations').add_to(marker_cluster_group)
-for i, loc in enumerate(cluster_locations):
-    folium.Marker(loc, tooltip=f"Clustered Point {i+1}<br>Lat: {loc[0]:.2f}, Lng: {loc[1]:.2f}").add_to(marker_cluster)
+# 'chunkedLoading' lets addLayers() insert the markers in chunks without blocking the page
+marker_cluster = MarkerCluster(name='Clustered Locations', options={'chunkedLoading': True}).add_to(marker_cluster_group)
+# Tooltip text is built in the browser, the first time each marker's tooltip is shown
+CLUSTER_TOOLTIP = """function (latlng, index) {
+    return 'Clustered Point ' + (index + 1) + '<br>Lat: ' + latlng.lat.toFixed(2) + ', Lng: ' + latlng.lng.toFixed(2);
+}"""
+BulkMarkers(round_geojson_coords(cluster_locations), tooltip_callback=CLUSTER_TOOLTIP).add_to(marker_cluster)
 
 
 # --- 11. Add a Timestamped GeoJSON Layer ---
@@ -347,8 +843,27 @@ timestamped_geojson_data = {
 }
 
 # Create the TimestampedGeoJson layer
+# 'time_property' is not read by the plugin (it always uses 'times'), so it is dropped before embedding.
+# The plugin embeds a string as-is, so the data is passed pre-serialized in compact form (see below).
+slim_properties(timestamped_geojson_data, ['times', 'icon', 'iconstyle', 'popup'])
+round_geojson_coords(timestamped_geojson_data)
+
+# Many features share the same timestamps, so the unique times are shipped once as a sorted index
+# and each feature only stores positions in it. A small JS expression puts the full 'times' lists
+# back on the features when the page loads, before the plugin reads them.
+all_times = sorted({t for feature in timestamped_geojson_data['features'] for t in feature['properties']['times']})
+time_to_idx = {t: i for i, t in enumerate(all_times)}
+for feature in timestamped_geojson_data['features']:
+    feature['properties']['times'] = [time_to_idx[t] for t in feature['properties']['times']]
+timestamped_geojson_js = (
+    "(function (times, data) {"
+    " data.features.forEach(function (f) { f.properties.times = f.properties.times.map(function (i) { return times[i]; }); });"
+    " return data;"
+    f" }})({json.dumps(all_times, separators=JSON_SEPARATORS)}, {json.dumps(timestamped_geojson_data, separators=JSON_SEPARATORS)})"
+)
+
 timestamped_geojson_layer = TimestampedGeoJson(
-    timestamped_geojson_data,
+    timestamped_geojson_js,
     period='P1M', # Period between timestamps (e.g., P1D for 1 day, P1M for 1 month)
     auto_play=True,
     loop=True,
@@ -378,40 +893,67 @@ folium.raster_layers.ImageOverlay(
 ).add_to(image_overlay_group)
 
 
-# --- 13. Add Random Points with Dynamic Popups/Tooltips & Data-Driven Icons ---
-print("Adding random points with dynamic popups and data-driven icons...")
-for i in range(20):
-    lat = 51.45 + (random.random() * 0.15) # Random lat within a range
-    lon = -0.2 + (random.random() * 0.15) # Random lon within a range
-    value = random.randint(10, 100) # Example data value
-
-    # Data-driven icon styling
-    if value > 80:
-        icon_color = 'green'
-        icon_name = 'star'
-        popup_text = f"High Value: {value}"
-    elif value > 40:
-        icon_color = 'orange'
-        icon_name = 'info-circle'
-        popup_text = f"Medium Value: {value}"
-    else:
-        icon_color = 'red'
-        icon_name = 'exclamation-triangle'
-        popup_text = f"Low Value: {value}"
-
-    html_popup = f"""
-    <h4>Random Point {i+1}</h4>
-    <p>Value: <b>{value}</b></p>
-    <p>Coordinates: {lat:.4f}, {lon:.4f}</p>
-    <p>{popup_text}</p>
-    <small>Data generated randomly.</small>
-    """
-    folium.Marker(
-        location=[lat, lon],
-        popup=folium.Popup(html_popup, max_width=250),
-        tooltip=f"Point {i+1} (Value: {value})",
-        icon=folium.Icon(color=icon_color, icon=icon_name, prefix='fa') # Use Font Awesome icons
-    ).add_to(random_points_group)
+# --- 13. Add Random Points with Dynamic Popups/Tooltips & Data-Driven Styling ---
+print("Adding random points with dynamic popups and data-driven styling...")
+# All points go into one GeoJSON FeatureCollection rendered as circle markers,
+# so the page gets a single JS data literal instead of 20 separate L.marker(...) calls and icon <div>s.
+
+# Coordinates, values and colour bins are generated for all points at once with NumPy.
+NUM_RANDOM_POINTS = 20
+rng = np.random.default_rng()
+lats = 51.45 + rng.random(NUM_RANDOM_POINTS) * 0.15 # Random lats within a range
+lons = -0.2 + rng.random(NUM_RANDOM_POINTS) * 0.15 # Random lons within a range
+values = rng.integers(10, 101, NUM_RANDOM_POINTS) # Example data values (10-100)
+
+# Data-driven styling: 10-40 -> Low (red), 41-80 -> Medium (orange), 81-100 -> High (green)
+bins = np.digitize(values, [41, 81])
+point_colors = np.array(['red', 'orange', 'green'])[bins]
+value_labels = np.array(['Low', 'Medium', 'High'])[bins]
+
+# The features are zipped straight from the NumPy columns, with no per-point string formatting in Python:
+# the popup and tooltip HTML is built in the browser from the feature's id, value and coordinates.
+random_point_features = [
+    {
+        "type": "Feature",
+        "id": i + 1, # Point number shown in the popup/tooltip
+        "geometry": {"type": "Point", "coordinates": [lon, lat]}, # GeoJSON uses [lon, lat]
+        "properties": {"value": value, "level": value_label, "color": point_color}
+    }
+    # .tolist() hands plain Python floats/ints/strs to the JSON serializer
+    for i, (lat, lon, value, point_color, value_label) in enumerate(zip(
+        np.round(lats, COORD_DECIMALS).tolist(), np.round(lons, COORD_DECIMALS).tolist(),
+        values.tolist(), point_colors.tolist(), value_labels.tolist()
+    ))
+]
+
+random_points_geojson = {"type": "FeatureCollection", "features": random_point_features}
+
+# Binds the same popup/tooltip content the Python loop used to format, built lazily per feature in JS
+RANDOM_POINT_POPUP = folium.utilities.JsCode("""function (feature, layer) {
+    var p = feature.properties;
+    var c = feature.geometry.coordinates;
+    layer.bindTooltip('Point ' + feature.id + ' (Value: ' + p.value + ')');
+    layer.bindPopup(function () {
+        return '<h4>Random Point ' + feature.id + '</h4>' +
+            '<p>Value: <b>' + p.value + '</b></p>' +
+            '<p>Coordinates: ' + c[1].toFixed(4) + ', ' + c[0].toFixed(4) + '</p>' +
+            '<p>' + p.level + ' Value: ' + p.value + '</p>' +
+            '<small>Data generated randomly.</small>';
+    }, {maxWidth: 250});
+}""")
+
+folium.GeoJson(
+    random_points_geojson,
+    name='Random Points',
+    marker=folium.CircleMarker(radius=6), # Each point is drawn as a lightweight circle marker
+    style_function=lambda x: {
+        'fillColor': x['properties']['color'],
+        'color': x['properties']['color'],
+        'weight': 1,
+        'fillOpacity': 0.8
+    },
+    on_each_feature=RANDOM_POINT_POPUP
+).add_to(random_points_group)
 
 
 # --- 14. Add Clickable Regions with Custom Popups (using onEachFeature for GeoJson) ---
@@ -449,15 +991,18 @@ clickable_regions_geojson = {
     ]
 }
 
-# Define a function to be executed for each feature
-def style_function(feature):
-    return {
+# Precompute each feature's style once and store it on the feature as '_style'
+for feature in clickable_regions_geojson['features']:
+    feature['properties']['_style'] = {
         'fillColor': '#4CAF50' if feature['properties']['type'] == 'District' else '#FFC107',
         'color': 'black',
         'weight': 2,
         'fillOpacity': 0.5
     }
 
+def style_function(feature):
+    return feature['properties']['_style']
+
 def on_each_feature(feature, layer):
     # Bind popup with dynamic content from feature properties
     popup_content = f"<b>{feature['properties']['name']}</b><br>{feature['properties']['info']}<br>Type: {feature['properties']['type']}"
@@ -469,6 +1014,9 @@ def on_each_feature(feature, layer):
         layer.on('mouseout', lambda x: layer.setStyle({'fillOpacity': 0.5, 'weight': 2}))
 
 
+filter_to_view(clickable_regions_geojson, view_bounds)
+slim_properties(clickable_regions_geojson, ['name', 'info', 'type', '_style']) # Only tooltip/popup/style fields
+round_geojson_coords(clickable_regions_geojson)
 folium.GeoJson(
     clickable_regions_geojson,
     name='Clickable Regions',
@@ -485,13 +1033,23 @@ folium.GeoJson(
 # and attempts a reverse geocoding lookup.
 print("Adding custom JavaScript interaction with reverse geocoding...")
 js_code = """
+// Addresses already looked up, keyed by the coordinates rounded to 4 decimals (~10 m),
+// so clicking the same spot again does not query Nominatim a second time
+var addressCache = new Map();
+
 // Function to get address from coordinates using Nominatim (OpenStreetMap)
 function getAddressFromLatLng(lat, lng, callback) {
+    var cacheKey = lat.toFixed(4) + ',' + lng.toFixed(4);
+    if (addressCache.has(cacheKey)) {
+        callback(addressCache.get(cacheKey));
+        return;
+    }
     var url = `https://nominatim.openstreetmap.org/reverse?format=json&lat=${lat}&lon=${lng}&zoom=18&addressdetails=1`;
     fetch(url)
         .then(response => response.json())
         .then(data => {
             if (data.display_name) {
+                addressCache.set(cacheKey, data.display_name); // Only successful lookups are cached
                 callback(data.display_name);
             } else {
                 callback("Address not found.");
@@ -503,8 +1061,19 @@ function getAddressFromLatLng(lat, lng, callback) {
         });
 }
 
-// Access the map object using its internal Leaflet ID (m._leaflet_id) or global 'm' variable if defined
+// Leading-edge debounce: the first click is handled straight away, further clicks within
+// CLICK_DEBOUNCE_MS (e.g. the two clicks of a double-click zoom) are ignored.
+// This also keeps the lookups under Nominatim's limit of one request per second.
+var CLICK_DEBOUNCE_MS = 500;
+var clickTimer = null;
+
+// 'm' is the Leaflet map object (declared above this code)
 m.on('click', function(e) {
+    if (clickTimer) {
+        return;
+    }
+    clickTimer = setTimeout(function () { clickTimer = null; }, CLICK_DEBOUNCE_MS);
+
     var lat = e.latlng.lat;
     var lng = e.latlng.lng;
     var message = "Map clicked at: Lat " + lat.toFixed(4) + ", Lng " + lng.toFixed(4);
@@ -527,22 +1096,13 @@ customButton.onAdd = function (map) {
     var div = L.DomUtil.create('div', 'leaflet-bar leaflet-control leaflet-control-custom');
     div.innerHTML = '<button style="background-color: #f8f8f8; width: 30px; height: 30px; line-height: 30px; text-align: center; cursor: pointer; border: 1px solid #ccc; border-radius: 4px;" title="Toggle Heatmap"><i class="fa fa-fire"></i></button>';
     div.firstChild.onclick = function() {
-        // Find the heatmap layer by name and toggle its visibility
-        var heatmapLayer = null;
-        m.eachLayer(function(layer) {
-            if (layer.options && layer.options.name === 'Simulated Heatmap') {
-                heatmapLayer = layer;
-            }
-        });
-
-        if (heatmapLayer) {
-            if (m.hasLayer(heatmapLayer)) {
-                m.removeLayer(heatmapLayer);
-                console.log('Heatmap layer removed');
-            } else {
-                m.addLayer(heatmapLayer);
-                console.log('Heatmap layer added');
-            }
+        // Toggle the heatmap layer directly through its cached reference (no layer scan per click)
+        if (m.hasLayer(heatmapLayer)) {
+            m.removeLayer(heatmapLayer);
+            console.log('Heatmap layer removed');
+        } else {
+            m.addLayer(heatmapLayer);
+            console.log('Heatmap layer added');
         }
     };
     return div;
@@ -550,8 +1110,9 @@ customButton.onAdd = function (map) {
 customButton.addTo(m);
 
 // Advanced JS for hover styling on GeoJSON polygons (client-side)
-// This will make 'Sample GeoJSON Features' polygons highlight on hover with different styles
-m.eachLayer(function (layer) {
+// This will make 'Sample GeoJSON Features' polygons highlight on hover with different styles.
+// Only the features of that one GeoJSON layer are looked at, once, instead of every layer on the map.
+sampleGeoJsonLayer.eachLayer(function (layer) {
     if (layer.feature && layer.feature.properties && layer.feature.properties.name === 'Hyde Park' && layer.feature.geometry.type === 'Polygon') {
         var originalStyle = layer.options.style(layer.feature);
         layer.on('mouseover', function () {
@@ -568,22 +1129,25 @@ m.eachLayer(function (layer) {
     }
 });
 """
-folium.Html(js_code).add_to(m)
+# Make the folium-generated layers available to the code above under fixed names
+CustomScript(js_code, m=m, heatmapLayer=heatmap_group, sampleGeoJsonLayer=sample_geojson_layer).add_to(m)
 
 
 # --- 16. Add core plugins for enhanced interactivity (re-ordered for logical flow and placement) ---
+# The plugins are collected in a list and registered on the map with one bulk_add() call at the end
+plugins = []
 
 # Add Fullscreen button to expand the map to full screen (top-left)
 print("Adding Fullscreen plugin...")
-Fullscreen(position='topleft').add_to(m)
+plugins.append(Fullscreen(position='topleft'))
 
 # Add MiniMap (an overview map in the corner, bottom-right)
 print("Adding MiniMap plugin...")
-MiniMap(toggle_display=True, position='bottomright').add_to(m)
+plugins.append(MiniMap(toggle_display=True, position='bottomright'))
 
 # Add Draw tools (bottom-left, which includes the export button)
 print("Adding Draw plugin...")
-Draw(
+plugins.append(Draw(
     export=True, # Allows downloading drawn features as GeoJSON
     filename='drawn_features.geojson', # Default filename for export
     position='bottomleft', # Explicitly placed Draw tools (with export) to bottom-left
@@ -599,35 +1163,37 @@ Draw(
         'edit': True,
         'remove': True
     }
-).add_to(m)
+))
 
 # Add Geocoder (search bar, top-left - to separate from Draw if it shifts)
 print("Adding Geocoder plugin...")
-Geocoder(position='topleft').add_to(m) # Explicitly placed search bar to top-left
+plugins.append(Geocoder(position='topleft')) # Explicitly placed search bar to top-left
 
 # Add Locate Control (button to find user's current location, top-left)
 print("Adding LocateControl plugin...")
-LocateControl(position='topleft').add_to(m)
+plugins.append(LocateControl(position='topleft'))
 
 
 # Add Mouse Position display to show coordinates of the mouse pointer (bottom-right)
 print("Adding MousePosition plugin...")
-MousePosition(
+plugins.append(MousePosition(
     position='bottomright',
     separator=' | ',
     empty_string='LatLng',
     lng_first=False,
     num_digits=4,
     prefix='Coordinates: '
-).add_to(m)
+))
 
 # Add Measure Control to measure distances and areas on the map (bottom-left, will stack with Draw)
 print("Adding MeasureControl plugin...")
-MeasureControl(position='bottomleft', primary_length_unit='meters', secondary_length_unit='miles').add_to(m)
+plugins.append(MeasureControl(position='bottomleft', primary_length_unit='meters', secondary_length_unit='miles'))
 
 # Add LatLngPopup: Clicking on the map will display the latitude and longitude (handled by custom JS now)
 # This was commented out in previous versions because custom JS handles it, keeping it that way.
 
+bulk_add(m, plugins)
+
 
 # --- 17. Add the Layer Control to the map ---
 # This needs to be added AFTER all TileLayers and FeatureGroups
@@ -637,6 +1203,8 @@ folium.LayerControl(position='bottomright').add_to(m) # Moved LayerControl to bo
 
 
 # --- 18. Save the map to an HTML file ---
-output_file = 'interactive_map.html'
-m.save(output_file)
+with compact_json(JSON_DUMPS_FUNCTION):
+    compressed_files = save_compressed(m, output_file)
 print(f"Advanced map successfully generated and saved to '{output_file}'")
+for compressed_file in compressed_files:
+    print(f"Compressed copy for static hosting saved to '{compressed_file}'")
@@ -3,538 +3,944 @@ import folium
 # Import plugins for more advanced features
 from folium.plugins import (
     Fullscreen, MiniMap, Draw, Geocoder, MousePosition, MeasureControl,
-    HeatMap, MarkerCluster, TimestampedGeoJson, LocateControl
+    HeatMap, LocateControl
 )
-# Import pandas for data manipulation, especially for Choropleth data
-import pandas as pd
 # Import branca for colormaps
+import branca
 from branca.colormap import linear
-import json # To handle GeoJSON data with timestamps
-import random # For generating random data for new features
+# MacroElement, JSCSSMixin, Layer and Template are used to emit custom Leaflet JS (e.g. the supercluster layer)
+from branca.element import MacroElement
+from folium.elements import JSCSSMixin
+from folium.map import Layer
+from folium.template import Template
+import hashlib # For telling whether the cached page skeleton is still up to date
+import jinja2 # Its version is part of the page cache key
+import json # For storing the cached page skeleton
+import numpy as np # For generating random data for new features
+import os
+# Shared helpers that save the map as plain and pre-compressed HTML
+import map_helpers # Its source is part of the page cache key
+from map_helpers import compact_json, save_compressed, write_compressed
+import sys # For the '--new-data' command-line flag
 import webbrowser # To automatically open the HTML file
 
-# --- 1. Create a base map ---
-# Initialize a Folium map object
-# 'location' sets the initial center coordinates (latitude, longitude)
-# 'zoom_start' sets the initial zoom level
-# 'tiles' specifies the initial map tile style
-print("Creating a base map centered near London (global weather enabled)...")
-m = folium.Map(
-    location=[51.5074, -0.1278], # Centered on London for a more general starting point
-    zoom_start=7,
-    tiles='OpenStreetMap',
-    attr='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors' # Added attribution
-)
-
-# --- 2. Add multiple Tile Layers for base map switching ---
-# These layers will be available through the LayerControl
-print("Adding additional tile layers...")
-folium.TileLayer('CartoDB positron', name='Light Mode', attr='&copy; <a href="https://carto.com/attributions">CartoDB</a>').add_to(m)
-folium.TileLayer('CartoDB dark_matter', name='Dark Mode', attr='&copy; <a href="https://carto.com/attributions">CartoDB</a>').add_to(m)
-folium.TileLayer('Stamen Toner', name='Toner', attr='Map tiles by <a href="http://stamen.com">Stamen Design</a>, <a href="http://creativecommons.org/licenses/by/3.0">CC BY 3.0</a> &mdash; Map data &copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors').add_to(m)
-folium.TileLayer('Stamen Terrain', name='Terrain', attr='Map tiles by <a href="http://stamen.com">Stamen Design</a>, <a href="http://creativecommons.org/licenses/by/3.0">CC BY 3.0</a> &mdash; Map data &copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors').add_to(m)
-
-
-# --- 3. Add FeatureGroups for better layer organization ---
-# FeatureGroup allows grouping related markers/polygons to be toggled together in LayerControl
-markers_group = folium.FeatureGroup(name='Sample Landmarks').add_to(m)
-shapes_group = folium.FeatureGroup(name='Area Features').add_to(m)
-geojson_group = folium.FeatureGroup(name='Sample GeoJSON Data').add_to(m)
-heatmap_group = folium.FeatureGroup(name='Simulated Heatmap').add_to(m)
-marker_cluster_group = folium.FeatureGroup(name='Clustered Locations').add_to(m)
-timestamp_geojson_group = folium.FeatureGroup(name='Temporal Data (Timestamps)').add_to(m)
-image_overlay_group = folium.FeatureGroup(name='Historical Map Overlay').add_to(m)
-random_points_group = folium.FeatureGroup(name='Random Points').add_to(m)
-clickable_regions_group = folium.FeatureGroup(name='Clickable Regions').add_to(m)
-weather_reports_group = folium.FeatureGroup(name='Weather Reports').add_to(m)
-
-# New FeatureGroup for weather overlays
-weather_overlays_group = folium.FeatureGroup(name='Weather Overlays').add_to(m)
-
-
-# --- 4. Add markers to the map within the 'markers_group' ---
-# Markers are points on the map, often with popups showing information
-print("Adding sample markers...")
-# Example 1: Red Fort, Delhi - Keeping Indian landmarks for variety, now on a global map
-folium.Marker(
-    location=[28.6562, 77.2410], # Latitude, Longitude for Red Fort
-    popup=folium.Popup("<b>Red Fort</b><br><i>Historic fort in Delhi, India</i><br><img src='https://placehold.co/100x60/ADD8E6/000000?text=RedFort' width='100px'>", max_width=300),
-    tooltip="Click for Red Fort info"
-).add_to(markers_group)
-
-# Example 2: Gateway of India, Mumbai
-folium.Marker(
-    location=[18.9220, 72.8347],
-    popup="<b>Gateway of India</b><br>Iconic arch monument in Mumbai, India.",
-    icon=folium.Icon(color='blue', icon='camera', prefix='fa'),
-    tooltip="Gateway of India"
-).add_to(markers_group)
-
-# Example 3: Taj Mahal, Agra
-folium.Marker(
-    location=[27.1751, 78.0421],
-    popup=folium.Popup("<b>Taj Mahal</b><br>Ivory-white marble mausoleum in Agra, India.<br><img src='https://placehold.co/100x60/F0F8FF/000000?text=TajMahal' width='100px'>", max_width=300),
-    icon=folium.CustomIcon(
-        icon_image='https://placehold.co/32x32/FFD700/000000?text=🕌', # Placeholder for a mosque icon
-        icon_size=(32, 32),
-        icon_anchor=(16, 32),
-        popup_anchor=(0, -20)
-    ),
-    tooltip="Taj Mahal"
-).add_to(markers_group)
-
-
-# --- 5. Add a CircleMarker for an area of interest within 'shapes_group' ---
-print("Adding a circle marker...")
-folium.CircleMarker(
-    location=[28.5245, 77.1855], # Example: Qutub Minar area in Delhi
-    radius=50, # Radius in pixels
-    popup="Qutub Minar Area",
-    color='#3186cc', # Border color
-    fill=True,
-    fill_color='#3186cc', # Fill color
-    fill_opacity=0.4 # Transparency of the fill
-).add_to(shapes_group)
-
-
-# --- 6. Add a simple Polygon within 'shapes_group' ---
-print("Adding a polygon...")
-folium.Polygon(
-    locations=[
-        [28.70, 77.10],
-        [28.70, 77.25],
-        [28.55, 77.25],
-        [28.55, 77.10],
-        [28.70, 77.10] # Close the polygon
-    ],
-    color='purple',
-    weight=3,
-    fill=True,
-    fill_color='lightpink',
-    fill_opacity=0.6,
-    popup="Sample City Zone (India)"
-).add_to(shapes_group)
-
-
-# --- 7. Add a sample GeoJSON layer (FeatureCollection) within 'geojson_group' ---
-# GeoJSON is a format for encoding a variety of geographic data structures.
-print("Adding a GeoJSON layer...")
-sample_geojson_data = {
-    "type": "FeatureCollection",
-    "features": [
-      {
-        "type": "Feature",
-        "properties": {
-          "name": "Connaught Place",
-          "description": "One of the largest financial, commercial and business centers in New Delhi, India.",
-          "fillColor": "#008080", # Teal
-          "strokeColor": "#008080"
-        },
-        "geometry": {
-          "type": "Polygon",
-          "coordinates": [
-            [
-              [77.21, 28.63],
-              [77.22, 28.63],
-              [77.22, 28.62],
-              [77.21, 28.62],
-              [77.21, 28.63]
-            ]
-          ]
-        }
-      },
-      {
-        "type": "Feature",
-        "properties": {
-          "name": "India Gate",
-          "description": "War memorial and iconic landmark in Delhi, India.",
-          "color": "#FF4500", # Orange Red
-          "weight": 5
-        },
-        "geometry": {
-          "type": "Point",
-          "coordinates": [77.2295, 28.6129]
-        }
-      }
+# --- Helper: build GeoJSON features ---
+# Every feature shares the same outer structure; only the coordinates and properties change.
+# These factories fill in the fixed parts, so the data below only spells out what varies.
+# Coordinates are passed GeoJSON-style as (longitude, latitude).
+def geojson_feature(geometry_type, coordinates, feature_id=None, **properties):
+    result = {"type": "Feature", "geometry": {"type": geometry_type, "coordinates": coordinates}, "properties": properties}
+    if feature_id is not None:
+        result["id"] = feature_id # Top-level id, e.g. for matching choropleth data
+    return result
+
+def point_feature(lon, lat, **properties):
+    return geojson_feature("Point", [lon, lat], **properties)
+
+def line_feature(points, **properties):
+    return geojson_feature("LineString", [list(point) for point in points], **properties)
+
+def polygon_feature(ring, **properties):
+    """'ring' is the outer boundary; it is closed automatically if its last point differs from the first."""
+    ring = [list(point) for point in ring]
+    if ring[0] != ring[-1]:
+        ring.append(list(ring[0]))
+    return geojson_feature("Polygon", [ring], **properties)
+
+def feature_collection(features):
+    return {"type": "FeatureCollection", "features": list(features)}
+
+
+# --- Helper: reuse the rendered page between runs ---
+# With '--new-data' (see main()) only the simulated data changes between runs; everything else on
+# the page (tile layers, plugins, controls, custom JS) stays the same. After a full build,
+# save_page_skeleton() stores the page next to the output as '<output>.skeleton', with each data
+# blob swapped for a placeholder token, and the next run only fills its new data into that skeleton
+# instead of building and rendering the whole map again.
+# The skeleton is tagged with page_cache_key(), so it is only reused while this script, map_helpers.py
+# and the folium/branca/jinja2 versions stay the same. Delete the '.skeleton' file to force a full build.
+def page_cache_key():
+    """Hash the folium/branca/jinja2 versions and the source of this script and map_helpers.py."""
+    digest = hashlib.sha256(f'{folium.__version__} {branca.__version__} {jinja2.__version__}'.encode('utf-8'))
+    for path in (__file__, map_helpers.__file__):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def embedded_json(obj):
+    """Return 'obj' serialized exactly as folium's templates embed it (the shared 'tojson' filter).
+
+    Call it inside the same 'with compact_json():' block as the save, so it matches the saved page.
+    """
+    return Template("{{ obj|tojson }}").render(obj=obj)
+
+def save_page_skeleton(path, data_blobs):
+    """Store the page at 'path' with every {token: data} blob replaced by its token; False if a blob is not found once."""
+    with open(path, encoding='utf-8') as f:
+        page = f.read()
+    for token, data in data_blobs.items():
+        blob = embedded_json(data)
+        if page.count(blob) != 1:
+            # The page cannot be turned into a skeleton, so an older one must not be reused either
+            try:
+                os.remove(path + '.skeleton')
+            except FileNotFoundError:
+                pass
+            return False
+        page = page.replace(blob, token)
+    with open(path + '.skeleton', 'w', encoding='utf-8') as f:
+        json.dump({'key': page_cache_key(), 'page': page}, f)
+    return True
+
+def load_page_skeleton(path):
+    """Return the stored skeleton for 'path', or None if there is none matching page_cache_key()."""
+    try:
+        with open(path + '.skeleton', encoding='utf-8') as f:
+            skeleton = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return skeleton['page'] if skeleton.get('key') == page_cache_key() else None
+
+def fill_page_skeleton(page, data_blobs):
+    for token, data in data_blobs.items():
+        page = page.replace(token, embedded_json(data))
+    return page
+
+# --- Helper: simplify polygon and line geometries (Douglas-Peucker) ---
+# Leaflet's drawing cost grows with the number of vertices, so points that would deviate from the
+# outline by less than 'tolerance' degrees are dropped before the data is embedded.
+# Pick the tolerance from the finest zoom a layer is meant for (roughly 0.01 for world-scale
+# layers, 0.001 for city-scale ones). Pure Python, so no shapely is needed; points are untouched.
+def simplify_line(points, tolerance):
+    """Return the Douglas-Peucker simplification of a list of [lon, lat] points."""
+    if len(points) < 3:
+        return points
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        (x1, y1), (x2, y2) = points[start][:2], points[end][:2]
+        dx, dy = x2 - x1, y2 - y1
+        length_sq = dx * dx + dy * dy
+        max_dist_sq, index = 0.0, None
+        for i in range(start + 1, end):
+            px, py = points[i][:2]
+            # Squared distance from the point to the segment start-end
+            t = ((px - x1) * dx + (py - y1) * dy) / length_sq if length_sq else 0.0
+            t = max(0.0, min(1.0, t))
+            dist_sq = (px - x1 - t * dx) ** 2 + (py - y1 - t * dy) ** 2
+            if dist_sq > max_dist_sq:
+                max_dist_sq, index = dist_sq, i
+        if index is not None and max_dist_sq > tolerance * tolerance:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return [point for point, kept in zip(points, keep) if kept]
+
+def simplify_ring(ring, tolerance):
+    """Simplify a closed polygon ring, keeping the original if it would collapse below 4 points."""
+    simplified = simplify_line(ring, tolerance)
+    return simplified if len(simplified) >= 4 else ring
+
+def simplify_fc(fc, tolerance):
+    """Simplify every line and polygon of a GeoJSON FeatureCollection in place."""
+    for feature in fc['features']:
+        geometry = feature['geometry']
+        kind, coords = geometry['type'], geometry['coordinates']
+        if kind == 'LineString':
+            geometry['coordinates'] = simplify_line(coords, tolerance)
+        elif kind == 'MultiLineString':
+            geometry['coordinates'] = [simplify_line(line, tolerance) for line in coords]
+        elif kind == 'Polygon':
+            geometry['coordinates'] = [simplify_ring(ring, tolerance) for ring in coords]
+        elif kind == 'MultiPolygon':
+            geometry['coordinates'] = [[simplify_ring(ring, tolerance) for ring in polygon] for polygon in coords]
+    return fc
+
+
+# --- Helper: cluster points in the browser with supercluster ---
+# supercluster (https://github.com/mapbox/supercluster) indexes all points once in a KD-tree
+# (KDBush) for every zoom level. On each 'moveend' the layer asks the index for the clusters
+# inside the current view and draws only those, so panning and zooming cost a range query
+# instead of a re-clustering pass over every marker.
+# 'data' is a GeoJSON FeatureCollection of points; 'point_to_layer' is a JS function
+# (feature, latlng) -> Leaflet layer for single, unclustered points.
+# Extra keyword arguments are supercluster options (e.g. radius=60, maxZoom=16).
+class SuperclusterLayer(JSCSSMixin, Layer):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function () {
+                var index = new Supercluster({{ this.options|tojavascript }});
+                index.load({{ this.data|tojson }}.features);
+                var pointToLayer = {{ this.point_to_layer }};
+                var layer = L.geoJSON(null, {
+                    pointToLayer: function (feature, latlng) {
+                        var p = feature.properties;
+                        if (!p.cluster) {
+                            return pointToLayer(feature, latlng);
+                        }
+                        var size = p.point_count < 10 ? 'small' : p.point_count < 100 ? 'medium' : 'large';
+                        var marker = L.marker(latlng, {icon: L.divIcon({
+                            html: '<div><span>' + p.point_count_abbreviated + '</span></div>',
+                            className: 'marker-cluster marker-cluster-' + size,
+                            iconSize: L.point(40, 40)
+                        })});
+                        marker.on('click', function () {
+                            layer._map.setView(latlng, index.getClusterExpansionZoom(p.cluster_id));
+                        });
+                        return marker;
+                    }
+                });
+                function update() {
+                    var b = layer._map.getBounds();
+                    layer.clearLayers();
+                    layer.addData(index.getClusters(
+                        [b.getWest(), b.getSouth(), b.getEast(), b.getNorth()], layer._map.getZoom()
+                    ));
+                }
+                layer.on('add', function () {
+                    layer._map.on('moveend', update);
+                    update();
+                });
+                layer.on('remove', function () {
+                    layer._map.off('moveend', update);
+                });
+                return layer;
+            })();
+            {{ this.get_name() }}.addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    default_js = [
+        ('supercluster', 'https://unpkg.com/supercluster@8.0.1/dist/supercluster.min.js')
     ]
-}
-
-folium.GeoJson(
-    sample_geojson_data,
-    name='Sample GeoJSON Features',
-    tooltip=folium.features.GeoJsonTooltip(fields=['name', 'description']),
-    style_function=lambda x: {
-        'fillColor': x['properties'].get('fillColor', '#0000ff'),
-        'color': x['properties'].get('strokeColor', '#0000ff'),
-        'weight': x['properties'].get('weight', 3),
-        'fillOpacity': x['properties'].get('fillOpacity', 0.5) if x['geometry']['type'] == 'Polygon' else 0,
-    }
-).add_to(geojson_group)
-
-
-# --- 8. Add a Choropleth Map (sample data for regions) ---
-print("Adding a choropleth map...")
-
-# Using simplified global regions now
-simplified_global_regions = {
-    "type": "FeatureCollection",
-    "features": [
-        {
-            "type": "Feature",
-            "id": "Europe",
-            "properties": {"name": "Sample Region: Europe"},
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [0.0, 50.0], [10.0, 50.0], [10.0, 45.0], [0.0, 45.0], [0.0, 50.0]
-                ]]
-            }
-        },
-        {
-            "type": "Feature",
-            "id": "NorthAmerica",
-            "properties": {"name": "Sample Region: North America"},
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [-100.0, 40.0], [-90.0, 40.0], [-90.0, 35.0], [-100.0, 35.0], [-100.0, 40.0]
-                ]]
-            }
-        }
+    # Reuse Leaflet.markercluster's cluster bubble styles
+    default_css = [
+        ('markerclustercss', 'https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.css'),
+        ('markerclusterdefaultcss', 'https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.Default.css')
     ]
-}
-
-data_for_global_regions = [
-    {'feature_id': 'Europe', 'value': 180},
-    {'feature_id': 'NorthAmerica', 'value': 220}
-]
-
-data_df = pd.DataFrame(data_for_global_regions)
-colormap = linear.YlGnBu_09.scale(data_df['value'].min(), data_df['value'].max())
-
-choropleth_layer = folium.Choropleth(
-    geo_data=simplified_global_regions,
-    name='Sample Global Data (Intensity)',
-    data=data_df,
-    columns=['feature_id', 'value'],
-    key_on='feature.id',
-    fill_color='YlGnBu',
-    fill_opacity=0.7,
-    line_opacity=0.2,
-    legend_name='Data Value (Sample)',
-    highlight=True,
-    tooltip=folium.features.GeoJsonTooltip(fields=['name', 'value'], aliases=['Region:', 'Value:'], localize=True, sticky=False)
-)
 
-choropleth_layer.add_to(m)
-m.add_child(colormap)
-
-
-# --- 9. Add a Heatmap Layer ---
-print("Adding a Heatmap layer...")
-# Simulated data points for a heatmap globally
-heatmap_data = []
-for _ in range(100): # More points for global distribution
-    lat = random.uniform(-60.0, 80.0) # Latitude range for global
-    lon = random.uniform(-180.0, 180.0) # Longitude range for global
-    intensity = random.uniform(0.1, 1.0)
-    heatmap_data.append([lat, lon, intensity])
-
-HeatMap(heatmap_data).add_to(heatmap_group)
-
-
-# --- 10. Add a Marker Cluster Layer ---
-print("Adding a Marker Cluster layer...")
-# Simulated locations for marker clustering globally
-cluster_locations = []
-for _ in range(100): # More points for global distribution
-    lat = random.uniform(-60.0, 80.0)
-    lon = random.uniform(-180.0, 180.0)
-    cluster_locations.append([lat, lon])
-
-marker_cluster = MarkerCluster(name='Clustered Locations').add_to(marker_cluster_group)
-for i, loc in enumerate(cluster_locations):
-    folium.Marker(loc, tooltip=f"Clustered Point {i+1}<br>Lat: {loc[0]:.2f}, Lng: {loc[1]:.2f}").add_to(marker_cluster)
-
-
-# --- 11. Add a Timestamped GeoJSON Layer ---
-print("Adding a Timestamped GeoJSON layer...")
-# Sample GeoJSON data with a 'times' property for temporal visualization globally
-timestamped_geojson_data = {
-    "type": "FeatureCollection",
-    "features": [
-        {
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [0.0, 0.0] # Null Island
-            },
-            "properties": {
-                "times": ["2024-01-01T00:00:00Z", "2024-02-01T00:00:00Z", "2024-03-01T00:00:00Z"],
-                "icon": "circle",
-                "iconstyle": {
-                    "fillOpacity": 0.8, "stroke": "false", "radius": 8, "fillColor": "blue"
-                },
-                "popup": "<b>January Event:</b> Global pinpoint.",
-                "time_property": "times"
-            }
-        },
-        {
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [15.0, 45.0] # Central Europe
-            },
-            "properties": {
-                "times": ["2024-02-15T00:00:00Z", "2024-03-15T00:00:00Z", "2024-04-15T00:00:00Z"],
-                "icon": "circle",
-                "iconstyle": {
-                    "fillOpacity": 0.8, "stroke": "false", "radius": 8, "fillColor": "red"
-                },
-                "popup": "<b>February Event:</b> European activity.",
-                "time_property": "times"
-            }
-        },
-        {
-            "type": "Feature",
-            "geometry": {
-                "type": "LineString",
-                "coordinates": [
-                    [-70.0, 40.0],
-                    [-75.0, 35.0]
-                ]
-            },
-            "properties": {
-                "times": ["2024-01-20T00:00:00Z", "2024-02-20T00:00:00Z", "2024-03-20T00:00:00Z", "2024-04-20T00:00:00Z"],
-                "icon": "polyline",
-                "iconstyle": {
-                    "color": "orange", "weight": 5, "opacity": 0.7
-                },
-                "popup": "<b>March Movement:</b> Path taken over North America.",
-                "time_property": "times"
-            }
-        }
-    ]
-}
-
-timestamped_geojson_layer = TimestampedGeoJson(
-    timestamped_geojson_data,
-    period='P1M',
-    auto_play=True,
-    loop=True,
-    transition_time=700,
-    date_options='YYYY-MM-DD HH:mm:ss',
-)
-timestamped_geojson_layer.add_to(m)
-
-
-# --- 12. Add an Image Overlay ---
-print("Adding an Image Overlay...")
-# Example: A hypothetical historical map section of the world
-image_url = "https://upload.wikimedia.org/wikipedia/commons/thumb/3/30/World_map_1689.jpg/800px-World_map_1689.jpg"
-image_bounds = [[-80.0, -180.0], [80.0, 180.0]] # Full global coverage approx
-folium.raster_layers.ImageOverlay(
-    image=image_url,
-    bounds=image_bounds,
-    opacity=0.6,
-    name='1689 World Map Overlay'
-).add_to(image_overlay_group)
-
-
-# --- 13. Add Random Points with Dynamic Popups/Tooltips & Data-Driven Icons ---
-print("Adding random points with dynamic popups and data-driven icons globally...")
-for i in range(50): # More points for global distribution
-    lat = random.uniform(-60.0, 80.0)
-    lon = random.uniform(-180.0, 180.0)
-    value = random.randint(10, 100)
-
-    if value > 80:
-        icon_color = 'green'
-        icon_name = 'cloud-sun'
-        popup_text = f"High Value: {value}"
-    elif value > 40:
-        icon_color = 'orange'
-        icon_name = 'info-circle'
-        popup_text = f"Medium Value: {value}"
-    else:
-        icon_color = 'red'
-        icon_name = 'exclamation-triangle'
-        popup_text = f"Low Value: {value}"
-
-    html_popup = f"""
-    <h4>Random Point {i+1}</h4>
+    def __init__(self, data, point_to_layer, name=None, **options):
+        super().__init__(name=name)
+        self._name = 'SuperclusterLayer'
+        self.data = data
+        self.point_to_layer = point_to_layer
+        self.options = options
+
+
+# --- Helper: play time-stamped features from precomputed frames ---
+# Leaflet.TimeDimension (behind folium's TimestampedGeoJson) works out which features are visible
+# by checking every feature's 'times' on every step. Here the frames are computed once in Python
+# instead: monthly_frames() maps each month to the indices of the features shown in it, and
+# TimeFramesLayer builds every feature's Leaflet layer once and, on each step, only swaps in the
+# layers listed for the next month. A small control shows the month and pauses/resumes playback.
+def monthly_frames(features):
+    """Return {'YYYY-MM': [feature indices]} for every month from the first to the last timestamp."""
+    feature_months = [{t[:7] for t in feature['properties']['times']} for feature in features]
+    first, last = min(min(m) for m in feature_months), max(max(m) for m in feature_months)
+    frames = {}
+    year, month = int(first[:4]), int(first[5:7])
+    while f"{year:04d}-{month:02d}" <= last:
+        key = f"{year:04d}-{month:02d}"
+        frames[key] = [i for i, months in enumerate(feature_months) if key in months]
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return frames
+
+class TimeFramesLayer(Layer):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function () {
+                var frames = {{ this.frames|tojson }};
+                var months = Object.keys(frames);
+                var group = L.layerGroup();
+                // Every feature's layer is built once; the frames only pick which ones are shown
+                var cached = {{ this.data|tojson }}.features.map(function (feature) {
+                    var style = feature.properties.iconstyle || {};
+                    return L.geoJSON(feature, {
+                        pointToLayer: function (f, latlng) { return L.circleMarker(latlng, style); },
+                        style: function () { return style; }
+                    }).bindPopup(feature.properties.popup);
+                });
+                var frameIndex = 0;
+                var timer = null;
+                var control = L.control({position: 'bottomleft'});
+                var label, button;
+                control.onAdd = function () {
+                    var div = L.DomUtil.create('div', 'leaflet-bar leaflet-control');
+                    div.style.background = 'white';
+                    div.style.padding = '4px 8px';
+                    button = L.DomUtil.create('a', '', div);
+                    button.href = '#';
+                    button.style.display = 'inline-block';
+                    label = L.DomUtil.create('span', '', div);
+                    label.style.marginLeft = '6px';
+                    L.DomEvent.on(button, 'click', function (e) {
+                        L.DomEvent.preventDefault(e);
+                        timer ? pause() : play();
+                    });
+                    L.DomEvent.disableClickPropagation(div);
+                    return div;
+                };
+                function show(i) {
+                    frameIndex = i;
+                    group.clearLayers();
+                    frames[months[i]].forEach(function (j) { group.addLayer(cached[j]); });
+                    label.innerHTML = months[i];
+                }
+                function play() {
+                    button.innerHTML = '&#10074;&#10074;';
+                    timer = setInterval(function () {
+                        {%- if this.loop %}
+                        show((frameIndex + 1) % months.length);
+                        {%- else %}
+                        frameIndex + 1 < months.length ? show(frameIndex + 1) : pause();
+                        {%- endif %}
+                    }, {{ this.interval }});
+                }
+                function pause() {
+                    button.innerHTML = '&#9654;';
+                    clearInterval(timer);
+                    timer = null;
+                }
+                group.on('add', function () {
+                    control.addTo(group._map);
+                    show(frameIndex);
+                    {%- if this.auto_play %}
+                    play();
+                    {%- else %}
+                    pause();
+                    {%- endif %}
+                });
+                group.on('remove', function () {
+                    pause();
+                    control.remove();
+                });
+                return group;
+            })();
+            {{ this.get_name() }}.addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, data, frames, interval=700, auto_play=True, loop=True, name=None, **kwargs):
+        super().__init__(name=name, **kwargs)
+        self._name = 'TimeFramesLayer'
+        self.data = data
+        self.frames = frames
+        self.interval = interval # Milliseconds per frame
+        self.auto_play = auto_play
+        self.loop = loop
+
+
+# --- Helper: add custom JS that refers to folium objects by fixed variable names ---
+# folium gives every map and layer a generated JS name (e.g. 'map_3f2a...'). CustomScript declares
+# a 'var <alias> = <generated name>;' for each keyword argument and then emits the code inside the
+# page's main <script>, right after its parent's own script, so the referenced objects already exist.
+class CustomScript(MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            {%- for alias, element in this.references.items() %}
+            var {{ alias }} = {{ element.get_name() }};
+            {%- endfor %}
+            {{ this.code }}
+        {% endmacro %}
+    """)
+
+    def __init__(self, code, **references):
+        super().__init__()
+        self._name = 'CustomScript'
+        self.code = code
+        self.references = references
+
+
+# --- Simulated data (Sections 9, 10 and 13) ---
+# The simulated layers (Sections 9, 10 and 13) draw all their random numbers from one seeded
+# NumPy generator, in bulk arrays rather than one call per value. The fixed seed gives every run
+# the same data (folium's element ids still change); run with '--new-data' for new data (see main()).
+# The data is generated before the map is built, so a cached page can be reused.
+RANDOM_SEED = 42
+NUM_HEATMAP_POINTS = 100 # Section 9
+NUM_CLUSTER_POINTS = 100 # Section 10
+NUM_RANDOM_POINTS = 50 # Section 13
+
+# Popup and tooltip HTML shared by every point; only the fields in braces are filled in per point
+RANDOM_POINT_POPUP = """
+    <h4>Random Point {n}</h4>
     <p>Value: <b>{value}</b></p>
     <p>Coordinates: {lat:.4f}, {lon:.4f}</p>
-    <p>{popup_text}</p>
+    <p>{label} Value: {value}</p>
     <small>Data generated randomly.</small>
     """
-    folium.Marker(
-        location=[lat, lon],
-        popup=folium.Popup(html_popup, max_width=250),
-        tooltip=f"Point {i+1} (Value: {value})",
-        icon=folium.Icon(color=icon_color, icon=icon_name, prefix='fa')
-    ).add_to(random_points_group)
-
-
-# --- 14. Add Clickable Regions with Custom Popups (using onEachFeature for GeoJson) ---
-print("Adding clickable regions with custom popups globally...")
-clickable_regions_geojson = {
-    "type": "FeatureCollection",
-    "features": [
-        {
-            "type": "Feature",
-            "properties": {
-                "name": "Amazon Rainforest",
-                "info": "Vast tropical rainforest in South America, known for its biodiversity.",
-                "type": "Biome"
-            },
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [[
-                    [-70.0, -10.0], [-50.0, -10.0], [-50.0, 0.0], [-70.0, 0.0], [-70.0, -10.0]
-                ]]
-            }
-        },
-        {
-            "type": "Feature",
-            "properties": {
-                "name": "Mount Everest",
-                "info": "Earth's highest mountain above sea level, located in the Himalayas.",
-                "type": "Mountain"
+RANDOM_POINT_TOOLTIP = "Point {n} (Value: {value})"
+
+def simulate_data(seed):
+    """Return the simulated data as {placeholder token: data blob embedded in the page}."""
+    rng = np.random.default_rng(seed)
+    # All three sections use random global locations (latitude -60..80, longitude -180..180), so they
+    # are drawn as one (N, 2) [lat, lon] array and split into a slice per section.
+    heatmap_latlons, cluster_latlons, random_latlons = np.split(
+        rng.uniform([-60.0, -180.0], [80.0, 180.0], size=(NUM_HEATMAP_POINTS + NUM_CLUSTER_POINTS + NUM_RANDOM_POINTS, 2)),
+        [NUM_HEATMAP_POINTS, NUM_HEATMAP_POINTS + NUM_CLUSTER_POINTS]
+    )
+
+    # Section 9: simulated data points for a heatmap globally
+    # Rounded before embedding: 4 decimals (~10 m) for the coordinates and 2 for the intensity are more
+    # than the heatmap can show, and keep each point to about a third of its full-precision JSON size.
+    heatmap_data = np.column_stack([
+        np.round(heatmap_latlons, 4), # Latitude, longitude
+        np.round(rng.uniform(0.1, 1.0, NUM_HEATMAP_POINTS), 2) # Intensity
+    ]).tolist()
+
+    # Section 10: simulated locations for marker clustering globally
+    cluster_locations = cluster_latlons.tolist()
+
+    # The points are embedded once as a GeoJSON FeatureCollection and clustered in the browser by
+    # SuperclusterLayer; single points get their marker and tooltip from a JS function (Section 10).
+    # Coordinates are rounded to 4 decimals (~10 m), well below what the tooltips display.
+    cluster_points = feature_collection(
+        point_feature(round(lon, 4), round(lat, 4), n=i + 1) for i, (lat, lon) in enumerate(cluster_locations)
+    )
+
+    # Section 13: coordinates, values and the data-driven icon choices are computed for all points at once;
+    # the loop below only assembles the GeoJSON features.
+    lats, lons = random_latlons.T
+    values = rng.integers(10, 101, NUM_RANDOM_POINTS) # 10-100
+    # > 80 -> High (green), > 40 -> Medium (orange), otherwise Low (red)
+    value_bands = [values > 80, values > 40]
+    icon_colors = np.select(value_bands, ['green', 'orange'], 'red')
+    icon_names = np.select(value_bands, ['cloud-sun', 'info-circle'], 'exclamation-triangle')
+    value_labels = np.select(value_bands, ['High', 'Medium'], 'Low')
+
+    # All 50 points go into one GeoJSON FeatureCollection drawn by a single folium.GeoJson layer.
+    random_point_features = []
+    for n, (lat, lon, value, icon_color, icon_name, value_label) in enumerate(zip(
+        lats.tolist(), lons.tolist(), values.tolist(), icon_colors.tolist(), icon_names.tolist(), value_labels.tolist()
+    ), start=1):
+        random_point_features.append(point_feature(
+            lon, lat,
+            value=value,
+            icon=icon_name,
+            color=icon_color,
+            popup=RANDOM_POINT_POPUP.format(n=n, value=value, lat=lat, lon=lon, label=value_label),
+            popupMaxWidth=250,
+            tooltip=RANDOM_POINT_TOOLTIP.format(n=n, value=value)
+        ))
+    random_points = feature_collection(random_point_features)
+    return {
+        '__HEATMAP_DATA__': heatmap_data,
+        '__CLUSTER_POINTS__': cluster_points,
+        '__RANDOM_POINTS__': random_points,
+    }
+
+
+output_file = 'interactive_map.html'
+
+
+# --- Build the map (Sections 1-17) ---
+def build_map(data):
+    """Build the map around the simulated 'data' from simulate_data() and return it."""
+    heatmap_data = data['__HEATMAP_DATA__']
+    cluster_points = data['__CLUSTER_POINTS__']
+    random_points = data['__RANDOM_POINTS__']
+
+    # --- 1. Create a base map ---
+    # Initialize a Folium map object
+    # 'location' sets the initial center coordinates (latitude, longitude)
+    # 'zoom_start' sets the initial zoom level
+    # 'tiles' specifies the initial map tile style
+    print("Creating a base map centered near London (global weather enabled)...")
+    # Leaflet tile loading options shared by every tile layer on the map:
+    # 'update_when_idle' waits until panning stops before fetching new tiles, and
+    # 'keep_buffer' keeps 4 rows/columns of off-screen tiles so panning back does not refetch them.
+    TILE_LAYER_OPTIONS = {'update_when_idle': True, 'keep_buffer': 4}
+
+    m = folium.Map(
+        location=[51.5074, -0.1278], # Centered on London for a more general starting point
+        zoom_start=7,
+        tiles=folium.TileLayer(
+            'OpenStreetMap',
+            attr='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors', # Added attribution
+            **TILE_LAYER_OPTIONS
+        )
+    )
+
+    # --- 2. Add multiple Tile Layers for base map switching ---
+    # These layers will be available through the LayerControl
+    print("Adding additional tile layers...")
+    CARTO_ATTRIBUTION = '&copy; <a href="https://carto.com/attributions">CartoDB</a>'
+    STAMEN_ATTRIBUTION = 'Map tiles by <a href="http://stamen.com">Stamen Design</a>, <a href="http://creativecommons.org/licenses/by/3.0">CC BY 3.0</a> &mdash; Map data &copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
+    TILE_LAYERS = [
+        # (tiles, name in LayerControl, attribution)
+        ('CartoDB positron', 'Light Mode', CARTO_ATTRIBUTION),
+        ('CartoDB dark_matter', 'Dark Mode', CARTO_ATTRIBUTION),
+        ('Stamen Toner', 'Toner', STAMEN_ATTRIBUTION),
+        ('Stamen Terrain', 'Terrain', STAMEN_ATTRIBUTION),
+    ]
+    for tiles, name, attr in TILE_LAYERS:
+        folium.TileLayer(tiles, name=name, attr=attr, **TILE_LAYER_OPTIONS).add_to(m)
+
+
+    # --- 3. Add FeatureGroups for better layer organization ---
+    # FeatureGroup allows grouping related markers/polygons to be toggled together in LayerControl
+    # The groups are created in this order, which is also their order in the LayerControl;
+    # later sections add their layers to groups['<name>'].
+    GROUPS = [
+        'Sample Landmarks',
+        'Area Features',
+        'Sample GeoJSON Data',
+        'Simulated Heatmap',
+        'Clustered Locations',
+        'Temporal Data (Timestamps)',
+        'Historical Map Overlay',
+        'Random Points',
+        'Clickable Regions',
+        'Weather Reports',
+    ]
+    groups = {name: folium.FeatureGroup(name=name).add_to(m) for name in GROUPS}
+    # The weather overlays are added straight to the map further below, one LayerControl entry each
+
+    # --- 4. Add markers to the map within the 'Sample Landmarks' group ---
+    # Markers are points on the map, often with popups showing information
+    print("Adding sample markers...")
+    # The landmarks are one GeoJSON FeatureCollection drawn by a single folium.GeoJson layer,
+    # instead of one folium.Marker (with its own popup/tooltip objects) each.
+    # 'iconType' says how each point is drawn; GeoJSON coordinates are [longitude, latitude].
+    landmark_features = [
+        # Example 1: Red Fort, Delhi - Keeping Indian landmarks for variety, now on a global map
+        point_feature(
+            77.2410, 28.6562,
+            iconType="marker",
+            popup="<b>Red Fort</b><br><i>Historic fort in Delhi, India</i><br><img src='https://placehold.co/100x60/ADD8E6/000000?text=RedFort' width='100px'>",
+            tooltip="Click for Red Fort info"
+        ),
+        # Example 2: Gateway of India, Mumbai
+        point_feature(
+            72.8347, 18.9220,
+            iconType="icon",
+            icon={"markerColor": "blue", "icon": "camera", "prefix": "fa"},
+            popup="<b>Gateway of India</b><br>Iconic arch monument in Mumbai, India.",
+            tooltip="Gateway of India"
+        ),
+        # Example 3: Taj Mahal, Agra
+        point_feature(
+            78.0421, 27.1751,
+            iconType="custom",
+            icon={
+                "iconUrl": "https://placehold.co/32x32/FFD700/000000?text=🕌", # Placeholder for a mosque icon
+                "iconSize": [32, 32],
+                "iconAnchor": [16, 32],
+                "popupAnchor": [0, -20]
             },
-            "geometry": {
-                "type": "Point",
-                "coordinates": [86.925, 27.988]
-            }
-        }
+            popup="<b>Taj Mahal</b><br>Ivory-white marble mausoleum in Agra, India.<br><img src='https://placehold.co/100x60/F0F8FF/000000?text=TajMahal' width='100px'>",
+            tooltip="Taj Mahal"
+        ),
     ]
-}
 
-def clickable_style_function(feature):
-    return {
-        'fillColor': '#228B22' if feature['properties']['type'] == 'Biome' else '#D3D3D3', # Forest Green or Light Gray
-        'color': 'white',
-        'weight': 2,
-        'fillOpacity': 0.6
-    }
+    # Builds each landmark's marker from its 'iconType'
+    LANDMARK_POINT_TO_LAYER = folium.utilities.JsCode("""function (feature, latlng) {
+        var p = feature.properties;
+        if (p.iconType === 'icon') {
+            return L.marker(latlng, {icon: L.AwesomeMarkers.icon(p.icon)});
+        }
+        if (p.iconType === 'custom') {
+            return L.marker(latlng, {icon: L.icon(p.icon)});
+        }
+        return L.marker(latlng);
+    }""")
+
+    # Binds the popup (max width 300px) and tooltip HTML stored on each feature; shared by the point layers
+    BIND_POPUP_AND_TOOLTIP = folium.utilities.JsCode("""function (feature, layer) {
+        var p = feature.properties;
+        if (p.popup) {
+            layer.bindPopup(p.popup, {maxWidth: p.popupMaxWidth || 300});
+        }
+        if (p.tooltip) {
+            layer.bindTooltip(p.tooltip);
+        }
+    }""")
+
+    folium.GeoJson(
+        feature_collection(landmark_features),
+        name='Sample Landmarks',
+        on_each_feature=BIND_POPUP_AND_TOOLTIP,
+        point_to_layer=LANDMARK_POINT_TO_LAYER
+    ).add_to(groups['Sample Landmarks'])
+
+
+    # --- 5. Add a CircleMarker for an area of interest within the 'Area Features' group ---
+    print("Adding a circle marker...")
+    folium.CircleMarker(
+        location=[28.5245, 77.1855], # Example: Qutub Minar area in Delhi
+        radius=50, # Radius in pixels
+        popup="Qutub Minar Area",
+        color='#3186cc', # Border color
+        fill=True,
+        fill_color='#3186cc', # Fill color
+        fill_opacity=0.4 # Transparency of the fill
+    ).add_to(groups['Area Features'])
+
+
+    # --- 6. Add a simple Polygon within the 'Area Features' group ---
+    print("Adding a polygon...")
+    folium.Polygon(
+        locations=[
+            [28.70, 77.10],
+            [28.70, 77.25],
+            [28.55, 77.25],
+            [28.55, 77.10],
+            [28.70, 77.10] # Close the polygon
+        ],
+        color='purple',
+        weight=3,
+        fill=True,
+        fill_color='lightpink',
+        fill_opacity=0.6,
+        popup="Sample City Zone (India)"
+    ).add_to(groups['Area Features'])
+
+
+    # --- 7. Add a sample GeoJSON layer (FeatureCollection) within the 'Sample GeoJSON Data' group ---
+    # GeoJSON is a format for encoding a variety of geographic data structures.
+    print("Adding a GeoJSON layer...")
+    sample_geojson_data = feature_collection([
+        polygon_feature(
+            [(77.21, 28.63), (77.22, 28.63), (77.22, 28.62), (77.21, 28.62)],
+            name="Connaught Place",
+            description="One of the largest financial, commercial and business centers in New Delhi, India.",
+            fillColor="#008080", # Teal
+            strokeColor="#008080"
+        ),
+        point_feature(
+            77.2295, 28.6129,
+            name="India Gate",
+            description="War memorial and iconic landmark in Delhi, India.",
+            color="#FF4500", # Orange Red
+            weight=5
+        ),
+    ])
+    simplify_fc(sample_geojson_data, 0.001) # City-scale layer
+
+    # The style only depends on each feature's own properties, so it is worked out once here
+    # and stored on the feature as '_style'. The style_function then just reads it back.
+    for feature in sample_geojson_data['features']:
+        properties = feature['properties']
+        properties['_style'] = {
+            'fillColor': properties.get('fillColor', '#0000ff'),
+            'color': properties.get('strokeColor', '#0000ff'),
+            'weight': properties.get('weight', 3),
+            'fillOpacity': properties.get('fillOpacity', 0.5) if feature['geometry']['type'] == 'Polygon' else 0, # Only fill for polygons
+        }
 
-folium.GeoJson(
-    clickable_regions_geojson,
-    name='Clickable Regions',
-    style_function=clickable_style_function,
-    highlight_function=lambda x: {'fillColor': '#FFFF00', 'color': 'black', 'weight': 5, 'dashArray': '10, 5'},
-    tooltip=folium.features.GeoJsonTooltip(fields=['name', 'info']),
-    control=True
-).add_to(clickable_regions_group)
-
-
-# --- 15. Add Custom JavaScript Interaction (includes reverse geocoding on click, Weather API Integration, and more) ---
-print("Adding custom JavaScript interaction with reverse geocoding, weather API, and control styling...")
-js_code = f"""
-// ** IMPORTANT: Replace 'YOUR_OPENWEATHERMAP_API_KEY' with your actual API key **
-// You can get a free API key from OpenWeatherMap: https://openweathermap.org/api
-const OPENWEATHERMAP_API_KEY = ''; // <<< PUT YOUR API KEY HERE
-
-// Function to get address from coordinates using Nominatim (OpenStreetMap)
-function getAddressFromLatLng(lat, lng, callback) {{
-    var url = `https://nominatim.openstreetmap.org/reverse?format=json&lat=${{lat}}&lon=${{lng}}&zoom=18&addressdetails=1`;
-    fetch(url)
-        .then(response => response.json())
-        .then(data => {{
-            if (data.display_name) {{
-                callback(data.display_name);
-            }} else {{
-                callback("Address not found.");
-            }}
-        }})
-        .catch(error => {{
-            console.error("Error during reverse geocoding:", error);
-            callback("Error getting address.");
-        }});
-}}
+    sample_geojson_layer = folium.GeoJson(
+        sample_geojson_data,
+        name='Sample GeoJSON Features',
+        tooltip=folium.features.GeoJsonTooltip(fields=['name', 'description']),
+        style_function=lambda x: x['properties']['_style']
+    ).add_to(groups['Sample GeoJSON Data'])
+
+
+    # --- 8. Add a Choropleth Map (sample data for regions) ---
+    print("Adding a choropleth map...")
+
+    # Using simplified global regions now
+    simplified_global_regions = feature_collection([
+        polygon_feature([(0.0, 50.0), (10.0, 50.0), (10.0, 45.0), (0.0, 45.0)], feature_id="Europe", name="Sample Region: Europe"),
+        polygon_feature([(-100.0, 40.0), (-90.0, 40.0), (-90.0, 35.0), (-100.0, 35.0)], feature_id="NorthAmerica", name="Sample Region: North America"),
+    ])
+    simplify_fc(simplified_global_regions, 0.01) # World-scale layer
+
+    # Sample value per region, keyed by the feature id
+    value_by_id = {'Europe': 180, 'NorthAmerica': 220}
+
+    colormap = linear.YlGnBu_09.scale(min(value_by_id.values()), max(value_by_id.values()))
+    colormap.caption = 'Data Value (Sample)' # Legend title
+
+    # Look up each region's value and colour once here and store them on the feature
+    for feature in simplified_global_regions['features']:
+        feature['properties']['value'] = value_by_id[feature['id']]
+        feature['properties']['fillColor'] = colormap(value_by_id[feature['id']])
+
+    choropleth_layer = folium.GeoJson(
+        simplified_global_regions,
+        name='Sample Global Data (Intensity)',
+        style_function=lambda x: {
+            'fillColor': x['properties']['fillColor'],
+            'fillOpacity': 0.7,
+            'color': 'black',
+            'opacity': 0.2,
+            'weight': 1
+        },
+        highlight_function=lambda x: {'weight': 3, 'fillOpacity': 0.9},
+        tooltip=folium.features.GeoJsonTooltip(fields=['name', 'value'], aliases=['Region:', 'Value:'], localize=True, sticky=False)
+    ).add_to(m)
+    m.add_child(colormap)
+
+
+    # --- 9. Add a Heatmap Layer ---
+    print("Adding a Heatmap layer...")
+    HeatMap(heatmap_data).add_to(groups['Simulated Heatmap'])
+
+
+    # --- 10. Add a Marker Cluster Layer ---
+    print("Adding a Marker Cluster layer...")
+    CLUSTER_POINT_TO_LAYER = """function (feature, latlng) {
+        return L.marker(latlng).bindTooltip(
+            'Clustered Point ' + feature.properties.n + '<br>Lat: ' + latlng.lat.toFixed(2) + ', Lng: ' + latlng.lng.toFixed(2)
+        );
+    }"""
+    SuperclusterLayer(cluster_points, CLUSTER_POINT_TO_LAYER, name='Clustered Locations', radius=80, maxZoom=16).add_to(groups['Clustered Locations'])
+
+
+    # --- 11. Add a Timestamped GeoJSON Layer ---
+    print("Adding a Timestamped GeoJSON layer...")
+    # Sample GeoJSON data with a 'times' property for temporal visualization globally
+    # Style shared by the two timed circle markers; each one only changes the fill colour
+    TIMESTAMP_CIRCLE_STYLE = {"fillOpacity": 0.8, "stroke": "false", "radius": 8}
+    timestamped_geojson_data = feature_collection([
+        point_feature(
+            0.0, 0.0, # Null Island
+            times=["2024-01-01T00:00:00Z", "2024-02-01T00:00:00Z", "2024-03-01T00:00:00Z"],
+            icon="circle",
+            iconstyle=dict(TIMESTAMP_CIRCLE_STYLE, fillColor="blue"),
+            popup="<b>January Event:</b> Global pinpoint.",
+            time_property="times"
+        ),
+        point_feature(
+            15.0, 45.0, # Central Europe
+            times=["2024-02-15T00:00:00Z", "2024-03-15T00:00:00Z", "2024-04-15T00:00:00Z"],
+            icon="circle",
+            iconstyle=dict(TIMESTAMP_CIRCLE_STYLE, fillColor="red"),
+            popup="<b>February Event:</b> European activity.",
+            time_property="times"
+        ),
+        line_feature(
+            [(-70.0, 40.0), (-75.0, 35.0)],
+            times=["2024-01-20T00:00:00Z", "2024-02-20T00:00:00Z", "2024-03-20T00:00:00Z", "2024-04-20T00:00:00Z"],
+            icon="polyline",
+            iconstyle={"color": "orange", "weight": 5, "opacity": 0.7},
+            popup="<b>March Movement:</b> Path taken over North America.",
+            time_property="times"
+        ),
+    ])
+
+    # Which features are visible in each month, worked out once here instead of on every playback step
+    timestamp_frames = monthly_frames(timestamped_geojson_data['features'])
+    # The page only needs each feature's geometry, style and popup; the timestamps are in the frames
+    timestamp_features = feature_collection(
+        geojson_feature(f['geometry']['type'], f['geometry']['coordinates'], iconstyle=f['properties']['iconstyle'], popup=f['properties']['popup'])
+        for f in timestamped_geojson_data['features']
+    )
+
+    TimeFramesLayer(
+        timestamp_features,
+        timestamp_frames,
+        interval=700, # 0.7 seconds per month
+        auto_play=True,
+        loop=True,
+        name='Temporal Data (Timestamps)'
+    ).add_to(groups['Temporal Data (Timestamps)'])
+
+
+    # --- 12. Add an Image Overlay ---
+    print("Adding an Image Overlay...")
+    # Example: A hypothetical historical map section of the world
+    image_url = "https://upload.wikimedia.org/wikipedia/commons/thumb/3/30/World_map_1689.jpg/800px-World_map_1689.jpg"
+    image_bounds = [[-80.0, -180.0], [80.0, 180.0]] # Full global coverage approx
+    folium.raster_layers.ImageOverlay(
+        image=image_url,
+        bounds=image_bounds,
+        opacity=0.6,
+        interactive=False, # Purely visual: Leaflet attaches no mouse handlers to the image
+        name='1689 World Map Overlay'
+    ).add_to(groups['Historical Map Overlay'])
+
+
+    # --- 13. Add Random Points with Dynamic Popups/Tooltips & Data-Driven Icons ---
+    print("Adding random points with dynamic popups and data-driven icons globally...")
+    # Each point's Font Awesome icon and colour are read from its properties in the browser, so the
+    # generated JS stays the same whatever the random values are (see the page skeleton cache above).
+    RANDOM_POINT_TO_LAYER = folium.utilities.JsCode("""function (feature, latlng) {
+        var p = feature.properties;
+        return L.marker(latlng, {icon: L.AwesomeMarkers.icon({markerColor: p.color, icon: p.icon, prefix: 'fa'})});
+    }""")
+
+    folium.GeoJson(
+        random_points,
+        name='Random Points',
+        point_to_layer=RANDOM_POINT_TO_LAYER,
+        on_each_feature=BIND_POPUP_AND_TOOLTIP
+    ).add_to(groups['Random Points'])
+
+
+    # --- 14. Add Clickable Regions with Custom Popups (using onEachFeature for GeoJson) ---
+    print("Adding clickable regions with custom popups globally...")
+    clickable_regions_geojson = feature_collection([
+        polygon_feature(
+            [(-70.0, -10.0), (-50.0, -10.0), (-50.0, 0.0), (-70.0, 0.0)],
+            name="Amazon Rainforest",
+            info="Vast tropical rainforest in South America, known for its biodiversity.",
+            type="Biome"
+        ),
+        point_feature(
+            86.925, 27.988,
+            name="Mount Everest",
+            info="Earth's highest mountain above sea level, located in the Himalayas.",
+            type="Mountain"
+        ),
+    ])
+    simplify_fc(clickable_regions_geojson, 0.01) # World-scale layer
+
+    # Precompute each feature's style once and store it on the feature as '_style'
+    for feature in clickable_regions_geojson['features']:
+        feature['properties']['_style'] = {
+            'fillColor': '#228B22' if feature['properties']['type'] == 'Biome' else '#D3D3D3', # Forest Green or Light Gray
+            'color': 'white',
+            'weight': 2,
+            'fillOpacity': 0.6
+        }
 
-// Function to get weather data for given coordinates
-function getWeatherData(lat, lon, weatherDisplayElement) {{
-    if (!OPENWEATHERMAP_API_KEY) {{
-        weatherDisplayElement.innerHTML = '<div style="color: red; font-weight: bold;">Error: Please provide your OpenWeatherMap API Key in the code.</div>';
-        return;
+    # Hover style, the same for every region
+    CLICKABLE_HIGHLIGHT_STYLE = {'fillColor': '#FFFF00', 'color': 'black', 'weight': 5, 'dashArray': '10, 5'}
+
+    clickable_regions_layer = folium.GeoJson(
+        clickable_regions_geojson,
+        name='Clickable Regions',
+        style_function=lambda x: x['properties']['_style'],
+        highlight_function=lambda x: CLICKABLE_HIGHLIGHT_STYLE,
+        tooltip=folium.features.GeoJsonTooltip(fields=['name', 'info']),
+        control=True
+    ).add_to(groups['Clickable Regions'])
+
+
+    # --- 15. Add Custom JavaScript Interaction (includes reverse geocoding on click, Weather API Integration, and more) ---
+    print("Adding custom JavaScript interaction with reverse geocoding, weather API, and control styling...")
+    js_code = f"""
+    // ** IMPORTANT: Replace 'YOUR_OPENWEATHERMAP_API_KEY' with your actual API key **
+    // You can get a free API key from OpenWeatherMap: https://openweathermap.org/api
+    const OPENWEATHERMAP_API_KEY = ''; // <<< PUT YOUR API KEY HERE
+
+    // Function to get the address for coordinates using Nominatim (OpenStreetMap)
+    // Resolves with the address text, or with null if the lookup failed.
+    function getAddressFromLatLng(lat, lng) {{
+        var url = `https://nominatim.openstreetmap.org/reverse?format=json&lat=${{lat}}&lon=${{lng}}&zoom=18&addressdetails=1`;
+        return fetch(url)
+            .then(response => response.json())
+            .then(data => data.display_name || "Address not found.")
+            .catch(error => {{
+                console.error("Error during reverse geocoding:", error);
+                return null;
+            }});
     }}
 
-    const weatherApiUrl = `https://api.openweathermap.org/data/2.5/weather?lat=${{lat}}&lon=${{lon}}&appid=${{OPENWEATHERMAP_API_KEY}}&units=metric`;
-    weatherDisplayElement.innerHTML = 'Fetching weather...<br><div class="spinner-border spinner-border-sm text-info" role="status"><span class="visually-hidden">Loading...</span></span></div>'; // Added spinner
+    // Function to get weather data for given coordinates
+    // Resolves with the OpenWeatherMap response, or rejects with the reason it could not be fetched.
+    function getWeatherData(lat, lon) {{
+        if (!OPENWEATHERMAP_API_KEY) {{
+            return Promise.reject(new Error('Please provide your OpenWeatherMap API Key in the code'));
+        }}
 
-    fetch(weatherApiUrl)
-        .then(response => {{
-            if (!response.ok) {{
-                if (response.status === 401) {{
-                    throw new Error('Unauthorized: Invalid API key. Please check your OpenWeatherMap API Key.');
+        const weatherApiUrl = `https://api.openweathermap.org/data/2.5/weather?lat=${{lat}}&lon=${{lon}}&appid=${{OPENWEATHERMAP_API_KEY}}&units=metric`;
+        return fetch(weatherApiUrl)
+            .then(response => {{
+                if (!response.ok) {{
+                    if (response.status === 401) {{
+                        throw new Error('Unauthorized: Invalid API key. Please check your OpenWeatherMap API Key.');
+                    }}
+                    throw new Error(`HTTP error! status: ${{response.status}}`);
                 }}
-                throw new Error(`HTTP error! status: ${{response.status}}`);
-            }}
-            return response.json();
-        }})
-        .then(data => {{
-            const city = data.name;
-            const temp = data.main.temp;
-            const description = data.weather[0].description;
-            const humidity = data.main.humidity;
-            const windSpeed = data.wind.speed;
-            const icon = data.weather[0].icon;
-
-            const weatherHtml = `
-                <div style="font-family: 'Arial', sans-serif; padding: 5px; background-color: #e0f2f7; border-radius: 5px; box-shadow: 0 2px 5px rgba(0,0,0,0.2);">
-                    <b>${{city}}</b><br>
-                    <img src="http://openweathermap.org/img/wn/${{icon}}@2x.png" alt="${{description}}" style="vertical-align: middle; width: 50px; height: 50px;">
-                    ${{temp.toFixed(1)}}°C, ${{description}}<br>
-                    Humidity: ${{humidity}}%<br>
-                    Wind: ${{windSpeed}} m/s
-                </div>
-            `;
-            weatherDisplayElement.innerHTML = weatherHtml;
-        }})
-        .catch(error => {{
-            console.error("Error fetching weather:", error);
-            weatherDisplayElement.innerHTML = `<div style="color: red;">Error: ${{error.message}}. Could not retrieve weather.</div>`;
-        }});
-}}
+                return response.json();
+            }});
+    }}
 
+    // Function to show weather data (or the error from getWeatherData) in the weather control
+    function showWeather(result, weatherDisplayElement) {{
+        if (result.error) {{
+            console.error("Error fetching weather:", result.error);
+            weatherDisplayElement.innerHTML = `<div style="color: red;">Error: ${{result.error.message}}. Could not retrieve weather.</div>`;
+            return;
+        }}
+        const data = result.data;
+        const city = data.name;
+        const temp = data.main.temp;
+        const description = data.weather[0].description;
+        const humidity = data.main.humidity;
+        const windSpeed = data.wind.speed;
+        const icon = data.weather[0].icon;
+
+        weatherDisplayElement.innerHTML = `
+            <div style="font-family: 'Arial', sans-serif; padding: 5px; background-color: #e0f2f7; border-radius: 5px; box-shadow: 0 2px 5px rgba(0,0,0,0.2);">
+                <b>${{city}}</b><br>
+                <img src="http://openweathermap.org/img/wn/${{icon}}@2x.png" alt="${{description}}" style="vertical-align: middle; width: 50px; height: 50px;">
+                ${{temp.toFixed(1)}}°C, ${{description}}<br>
+                Humidity: ${{humidity}}%<br>
+                Wind: ${{windSpeed}} m/s
+            </div>
+        `;
+    }}
 
-// Access the map object using its internal Leaflet ID (m._leaflet_id) or global 'm' variable if defined
-m.on('click', function(e) {{
-    var lat = e.latlng.lat;
-    var lng = e.latlng.lng;
-    var message = "Map clicked at: Lat " + lat.toFixed(4) + ", Lng " + lng.toFixed(4);
-    console.log(message); // Log to browser's developer console
+    // Address and weather lookups, keyed by the click position rounded to 2 decimals (about 1 km),
+    // so clicking near an earlier click reuses its results instead of calling both APIs again.
+    // Only complete, successful lookups are cached.
+    var lookupCache = new Map();
+    // Clicks are handled once the map has had no further click for CLICK_DEBOUNCE_MS,
+    // so a quick series of clicks only sends the requests for the last one.
+    var CLICK_DEBOUNCE_MS = 250;
+    var clickTimer = null;
+
+    // 'm' is the folium map; 'heatmapLayer', 'sampleGeoJsonLayer' and 'clickableRegionsLayer' are
+    // layers created above (all declared by CustomScript)
+    m.on('click', function(e) {{
+        clearTimeout(clickTimer);
+        clickTimer = setTimeout(function () {{ handleMapClick(e.latlng); }}, CLICK_DEBOUNCE_MS);
+    }});
 
-    // Use reverse geocoding to get address
-    getAddressFromLatLng(lat, lng, function(address) {{
-        var popupContent = `You clicked here!<br>Lat: ${{lat.toFixed(4)}}<br>Lng: ${{lng.toFixed(4)}}<br>Address: ${{address}}`;
-        L.popup()
-            .setLatLng(e.latlng)
-            .setContent(popupContent)
-            .openOn(m);
+    function handleMapClick(latlng) {{
+        var lat = latlng.lat;
+        var lng = latlng.lng;
+        var message = "Map clicked at: Lat " + lat.toFixed(4) + ", Lng " + lng.toFixed(4);
+        console.log(message); // Log to browser's developer console
 
-        // Fetch and display weather in the weather control based on click location
         const weatherResultDiv = document.getElementById('weather-result');
-        if (weatherResultDiv) {{
-            getWeatherData(lat, lng, weatherResultDiv);
+        var cacheKey = lat.toFixed(2) + ',' + lng.toFixed(2);
+        var lookup = lookupCache.get(cacheKey);
+        if (!lookup) {{
+            if (weatherResultDiv) {{
+                weatherResultDiv.innerHTML = 'Fetching weather...<br><div class="spinner-border spinner-border-sm text-info" role="status"><span class="visually-hidden">Loading...</span></span></div>'; // Added spinner
+            }}
+            // The reverse geocoding and weather requests are sent at the same time
+            lookup = Promise.all([
+                getAddressFromLatLng(lat, lng),
+                getWeatherData(lat, lng).then(data => ({{data: data}}), error => ({{error: error}}))
+            ]);
+            lookup.then(function (results) {{
+                if (results[0] !== null && !results[1].error) {{
+                    lookupCache.set(cacheKey, lookup);
+                }}
+            }});
         }}
-    }});
-}});
-
-// Custom button for toggling Heatmap layer (Top Right)
-var customButtonHeatmap = L.control({{position: 'topright'}});
-customButtonHeatmap.onAdd = function (map) {{
-    var div = L.DomUtil.create('div', 'leaflet-bar leaflet-control leaflet-control-custom');
-    div.innerHTML = '<button style="background-color: #f8f8f8; width: 30px; height: 30px; line-height: 30px; text-align: center; cursor: pointer; border: 1px solid #ccc; border-radius: 4px;" title="Toggle Simulated Heatmap"><i class="fa fa-fire"></i></button>';
-    div.firstChild.onclick = function() {{
-        var heatmapLayer = null;
-        m.eachLayer(function(layer) {{
-            if (layer.options && layer.options.name === 'Simulated Heatmap') {{
-                heatmapLayer = layer;
+
+        lookup.then(function (results) {{
+            var address = results[0] || "Error getting address.";
+            var popupContent = `You clicked here!<br>Lat: ${{lat.toFixed(4)}}<br>Lng: ${{lng.toFixed(4)}}<br>Address: ${{address}}`;
+            L.popup()
+                .setLatLng(latlng)
+                .setContent(popupContent)
+                .openOn(m);
+
+            // Display weather in the weather control based on click location
+            if (weatherResultDiv) {{
+                showWeather(results[1], weatherResultDiv);
             }}
         }});
-        if (heatmapLayer) {{
+    }}
+
+    // Custom button for toggling Heatmap layer (Top Right)
+    var customButtonHeatmap = L.control({{position: 'topright'}});
+    customButtonHeatmap.onAdd = function (map) {{
+        var div = L.DomUtil.create('div', 'leaflet-bar leaflet-control leaflet-control-custom');
+        div.innerHTML = '<button style="background-color: #f8f8f8; width: 30px; height: 30px; line-height: 30px; text-align: center; cursor: pointer; border: 1px solid #ccc; border-radius: 4px;" title="Toggle Simulated Heatmap"><i class="fa fa-fire"></i></button>';
+        div.firstChild.onclick = function() {{
+            // 'heatmapLayer' is the 'Simulated Heatmap' group, referenced directly
             if (m.hasLayer(heatmapLayer)) {{
                 m.removeLayer(heatmapLayer);
                 console.log('Simulated Heatmap layer removed');
@@ -542,208 +948,226 @@ customButtonHeatmap.onAdd = function (map) {{
                 m.addLayer(heatmapLayer);
                 console.log('Simulated Heatmap layer added');
             }}
-        }}
+        }};
+        return div;
+    }};
+    customButtonHeatmap.addTo(m);
+
+    // --- Custom Weather Control (Top Right) ---
+    var weatherControl = L.control({{position: 'topright'}});
+    weatherControl.onAdd = function (map) {{
+        var div = L.DomUtil.create('div', 'info legend leaflet-control', 'weather-control-panel');
+        div.style.backgroundColor = 'white';
+        div.style.padding = '10px';
+        div.style.borderRadius = '5px';
+        div.style.boxShadow = '0 1px 5px rgba(0,0,0,0.4)';
+        div.style.width = '250px';
+        div.style.pointerEvents = 'auto'; // Make it clickable/interactable
+        div.style.marginTop = '40px'; // Offset from top to avoid overlapping with heatmap toggle
+
+        div.innerHTML = `
+            <h4 style="margin-top: 0; font-size: 1.1em; color: #333;"><i class="fa fa-cloud"></i> Weather Report</h4>
+            <p style="font-size: 0.8em; margin-bottom: 5px; color: #666;">Click on map for local weather:</p>
+            <div id="weather-result" style="font-size: 0.9em; min-height: 50px; border: 1px solid #eee; padding: 5px; border-radius: 3px; background-color: #f9f9f9; display: flex; align-items: center; justify-content: center;">
+                Click a location on the map.
+            </div>
+            <p style="font-size: 0.7em; color: #999; margin-top: 10px;">
+                Powered by <a href="https://openweathermap.org/" target="_blank">OpenWeatherMap</a>. <br>
+                <span style="color: red; font-weight: bold;">Remember to add your API key in the code!</span>
+            </p>
+        `;
+
+        L.DomEvent.disableClickPropagation(div);
+        return div;
     }};
-    return div;
-}};
-customButtonHeatmap.addTo(m);
-
-// --- Custom Weather Control (Top Right) ---
-var weatherControl = L.control({{position: 'topright'}});
-weatherControl.onAdd = function (map) {{
-    var div = L.DomUtil.create('div', 'info legend leaflet-control', 'weather-control-panel');
-    div.style.backgroundColor = 'white';
-    div.style.padding = '10px';
-    div.style.borderRadius = '5px';
-    div.style.boxShadow = '0 1px 5px rgba(0,0,0,0.4)';
-    div.style.width = '250px';
-    div.style.pointerEvents = 'auto'; // Make it clickable/interactable
-    div.style.marginTop = '40px'; // Offset from top to avoid overlapping with heatmap toggle
-
-    div.innerHTML = `
-        <h4 style="margin-top: 0; font-size: 1.1em; color: #333;"><i class="fa fa-cloud"></i> Weather Report</h4>
-        <p style="font-size: 0.8em; margin-bottom: 5px; color: #666;">Click on map for local weather:</p>
-        <div id="weather-result" style="font-size: 0.9em; min-height: 50px; border: 1px solid #eee; padding: 5px; border-radius: 3px; background-color: #f9f9f9; display: flex; align-items: center; justify-content: center;">
-            Click a location on the map.
-        </div>
-        <p style="font-size: 0.7em; color: #999; margin-top: 10px;">
-            Powered by <a href="https://openweathermap.org/" target="_blank">OpenWeatherMap</a>. <br>
-            <span style="color: red; font-weight: bold;">Remember to add your API key in the code!</span>
-        </p>
-    `;
-
-    L.DomEvent.disableClickPropagation(div);
-    return div;
-}};
-weatherControl.addTo(m);
-
-
-// Advanced JS for hover styling on 'Sample GeoJSON Features' polygons (client-side)
-m.eachLayer(function (layer) {{
-    if (layer.feature && layer.feature.properties && (layer.feature.properties.name === 'Connaught Place' || layer.feature.properties.name === 'Hyde Park') && layer.feature.geometry.type === 'Polygon') {{
-        var originalStyle = layer.options.style(layer.feature);
-        layer.on('mouseover', function () {{
-            layer.setStyle({{
-                weight: 5,
-                color: '#666',
-                dashArray: '',
-                fillOpacity: 0.7
+    weatherControl.addTo(m);
+
+
+    // The hooks below only look at the features of their own GeoJSON layer, once, instead of
+    // scanning every layer on the map.
+
+    // Advanced JS for hover styling on 'Sample GeoJSON Features' polygons (client-side)
+    sampleGeoJsonLayer.eachLayer(function (layer) {{
+        if (layer.feature.properties.name === 'Connaught Place' && layer.feature.geometry.type === 'Polygon') {{
+            var originalStyle = layer.options.style(layer.feature);
+            layer.on('mouseover', function () {{
+                layer.setStyle({{
+                    weight: 5,
+                    color: '#666',
+                    dashArray: '',
+                    fillOpacity: 0.7
+                }});
             }});
-        }});
-        layer.on('mouseout', function () {{
-            layer.setStyle(originalStyle);
-        }});
-    }}
-}});
+            layer.on('mouseout', function () {{
+                layer.setStyle(originalStyle);
+            }});
+        }}
+    }});
 
-// JavaScript for 'Clickable Regions' GeoJSON popups and hover effects
-m.eachLayer(function(layer) {{
-    if (layer.feature && layer.feature.properties) {{
+    // JavaScript for 'Clickable Regions' GeoJSON popups and hover effects
+    clickableRegionsLayer.eachLayer(function (layer) {{
         var feature = layer.feature;
-        if (feature.properties.name === 'Jaipur (Pink City)' || feature.properties.name === 'Goa Beaches' || feature.properties.name === 'Amazon Rainforest' || feature.properties.name === 'Mount Everest') {{
-            var popupContent = `<b>${{feature.properties.name}}</b><br>${{feature.properties.info}}<br>Type: ${{feature.properties.type}}`;
-            layer.bindPopup(popupContent);
-
-            if (feature.geometry.type === 'Polygon') {{
-                var originalFillColor = layer.options.fillColor;
-                layer.on('mouseover', function () {{
-                    layer.setStyle({{
-                        fillColor: '#FFFFCC', // Light yellow on hover
-                        weight: 3,
-                        dashArray: '5, 5'
-                    }});
+        var popupContent = `<b>${{feature.properties.name}}</b><br>${{feature.properties.info}}<br>Type: ${{feature.properties.type}}`;
+        layer.bindPopup(popupContent);
+
+        if (feature.geometry.type === 'Polygon') {{
+            var originalFillColor = layer.options.fillColor;
+            layer.on('mouseover', function () {{
+                layer.setStyle({{
+                    fillColor: '#FFFFCC', // Light yellow on hover
+                    weight: 3,
+                    dashArray: '5, 5'
                 }});
-                layer.on('mouseout', function () {{
-                    layer.setStyle({{
-                        fillColor: originalFillColor,
-                        weight: 2,
-                        dashArray: ''
-                    }});
+            }});
+            layer.on('mouseout', function () {{
+                layer.setStyle({{
+                    fillColor: originalFillColor,
+                    weight: 2,
+                    dashArray: ''
                 }});
-            }}
+            }});
         }}
-    }}
-}});
-"""
-folium.Html(js_code).add_to(m)
-
-
-# --- NEW: Weather Overlay Layers (Added using OpenWeatherMap API) ---
-print("Adding OpenWeatherMap weather overlay layers...")
-
-# IMPORTANT: Ensure you have your OpenWeatherMap API key configured in the JavaScript section above.
-# These tile layers will not work without a valid API key.
-openweathermap_api_key = '' # This is just a placeholder in Python, the JS one is used.
-
-# Temperature layer
-folium.TileLayer(
-    tiles=f'https://tile.openweathermap.org/map/temp_new/{{z}}/{{x}}/{{y}}.png?appid={openweathermap_api_key}',
-    attr='Weather data &copy; <a href="https://openweathermap.org/">OpenWeatherMap</a>',
-    name='Temperature (ºC)',
-    overlay=True,
-    control=True,
-    opacity=0.6 # Make it semi-transparent
-).add_to(weather_overlays_group)
-
-# Precipitation layer
-folium.TileLayer(
-    tiles=f'https://tile.openweathermap.org/map/precipitation_new/{{z}}/{{x}}/{{y}}.png?appid={openweathermap_api_key}',
-    attr='Weather data &copy; <a href="https://openweathermap.org/">OpenWeatherMap</a>',
-    name='Precipitation',
-    overlay=True,
-    control=True,
-    opacity=0.6
-).add_to(weather_overlays_group)
-
-# Cloud layer
-folium.TileLayer(
-    tiles=f'https://tile.openweathermap.org/map/clouds_new/{{z}}/{{x}}/{{y}}.png?appid={openweathermap_api_key}',
-    attr='Weather data &copy; <a href="https://openweathermap.org/">OpenWeatherMap</a>',
-    name='Clouds',
-    overlay=True,
-    control=True,
-    opacity=0.6
-).add_to(weather_overlays_group)
-
-# Wind speed layer
-folium.TileLayer(
-    tiles=f'https://tile.openweathermap.org/map/wind_new/{{z}}/{{x}}/{{y}}.png?appid={openweathermap_api_key}',
-    attr='Weather data &copy; <a href="https://openweathermap.org/">OpenWeatherMap</a>',
-    name='Wind Speed',
-    overlay=True,
-    control=True,
-    opacity=0.6
-).add_to(weather_overlays_group)
-
-
-# --- 16. Add core plugins for enhanced interactivity (re-ordered for logical flow and placement) ---
-
-# Add Fullscreen button to expand the map to full screen (top-left)
-print("Adding Fullscreen plugin...")
-Fullscreen(position='topleft').add_to(m)
-
-# Add MiniMap (an overview map in the corner, bottom-right)
-print("Adding MiniMap plugin...")
-MiniMap(toggle_display=True, position='bottomright').add_to(m)
-
-# Add Draw tools (bottom-left, which includes the export button)
-print("Adding Draw plugin...")
-Draw(
-    export=True, # Allows downloading drawn features as GeoJSON
-    filename='drawn_features.geojson', # Default filename for export
-    position='bottomleft', # Explicitly placed Draw tools (with export) to bottom-left
-    draw_options={
-        'polyline': {'allowIntersection': False},
-        'polygon': {'allowIntersection': False},
-        'rectangle': True,
-        'circle': True,
-        'marker': True,
-        'circlemarker': True
-    },
-    edit_options={
-        'edit': True,
-        'remove': True
-    }
-).add_to(m)
-
-# Add Geocoder (search bar, top-left)
-print("Adding Geocoder plugin...")
-Geocoder(position='topleft').add_to(m) # Explicitly placed search bar to top-left
-
-# Add Locate Control (button to find user's current location, top-left)
-print("Adding LocateControl plugin...")
-LocateControl(position='topleft').add_to(m)
-
-
-# Add Mouse Position display to show coordinates of the mouse pointer (bottom-right)
-print("Adding MousePosition plugin...")
-MousePosition(
-    position='bottomright',
-    separator=' | ',
-    empty_string='LatLng',
-    lng_first=False,
-    num_digits=4,
-    prefix='Coordinates: '
-).add_to(m)
-
-# Add Measure Control to measure distances and areas on the map (bottom-left, will stack with Draw)
-print("Adding MeasureControl plugin...")
-MeasureControl(position='bottomleft', primary_length_unit='meters', secondary_length_unit='miles').add_to(m)
-
-
-# --- 17. Add the Layer Control to the map ---
-# This needs to be added AFTER all TileLayers and FeatureGroups
-# so it can properly list them and allow toggling visibility.
-print("Adding Layer Control...")
-folium.LayerControl(position='bottomright').add_to(m)
-
-
-# --- 18. Save the map to an HTML file ---
-output_file = 'interactive_map.html'
-m.save(output_file)
-print(f"Advanced map successfully generated and saved to '{output_file}'")
-
-# --- 19. Open the HTML file in the default web browser ---
-webbrowser.open(output_file)
+    }});
+    """
+    # Emitted inside the page's main <script>, after every layer created above
+    CustomScript(
+        js_code,
+        m=m,
+        heatmapLayer=groups['Simulated Heatmap'],
+        sampleGeoJsonLayer=sample_geojson_layer,
+        clickableRegionsLayer=clickable_regions_layer
+    ).add_to(m)
+
+
+    # --- NEW: Weather Overlay Layers (Added using OpenWeatherMap API) ---
+    print("Adding OpenWeatherMap weather overlay layers...")
+
+    # IMPORTANT: Ensure you have your OpenWeatherMap API key configured in the JavaScript section above.
+    # These tile layers will not work without a valid API key.
+    openweathermap_api_key = '' # This is just a placeholder in Python, the JS one is used.
+
+    # The four layers differ only in their name and the OWM map slug in the tile URL.
+    # Each one is added straight to the map as its own overlay with show=False: it appears in the
+    # LayerControl, but requests no tiles until it is ticked there.
+    # OWM tiles beyond OWM_MAX_NATIVE_ZOOM are upscaled in the browser instead of being fetched.
+    OWM_ATTRIBUTION = 'Weather data &copy; <a href="https://openweathermap.org/">OpenWeatherMap</a>'
+    OWM_MAX_NATIVE_ZOOM = 6
+    WEATHER_OVERLAYS = [
+        ('Temperature (ºC)', 'temp_new'),
+        ('Precipitation', 'precipitation_new'),
+        ('Clouds', 'clouds_new'),
+        ('Wind Speed', 'wind_new'),
+    ]
+    for name, slug in WEATHER_OVERLAYS:
+        folium.TileLayer(
+            tiles=f'https://tile.openweathermap.org/map/{slug}/{{z}}/{{x}}/{{y}}.png?appid={openweathermap_api_key}',
+            attr=OWM_ATTRIBUTION,
+            name=name,
+            overlay=True,
+            control=True,
+            show=False, # Loaded only once switched on in the LayerControl
+            opacity=0.6, # Make it semi-transparent
+            max_native_zoom=OWM_MAX_NATIVE_ZOOM,
+            **TILE_LAYER_OPTIONS
+        ).add_to(m)
+
+
+    # --- 16. Add core plugins for enhanced interactivity (re-ordered for logical flow and placement) ---
+
+    # Add Fullscreen button to expand the map to full screen (top-left)
+    print("Adding Fullscreen plugin...")
+    Fullscreen(position='topleft').add_to(m)
+
+    # Add MiniMap (an overview map in the corner, bottom-right)
+    print("Adding MiniMap plugin...")
+    MiniMap(toggle_display=True, position='bottomright').add_to(m)
+
+    # Add Draw tools (bottom-left, which includes the export button)
+    print("Adding Draw plugin...")
+    Draw(
+        export=True, # Allows downloading drawn features as GeoJSON
+        filename='drawn_features.geojson', # Default filename for export
+        position='bottomleft', # Explicitly placed Draw tools (with export) to bottom-left
+        draw_options={
+            'polyline': {'allowIntersection': False},
+            'polygon': {'allowIntersection': False},
+            'rectangle': True,
+            'circle': True,
+            'marker': True,
+            'circlemarker': True
+        },
+        edit_options={
+            'edit': True,
+            'remove': True
+        }
+    ).add_to(m)
+
+    # Add Geocoder (search bar, top-left)
+    print("Adding Geocoder plugin...")
+    Geocoder(position='topleft').add_to(m) # Explicitly placed search bar to top-left
+
+    # Add Locate Control (button to find user's current location, top-left)
+    print("Adding LocateControl plugin...")
+    LocateControl(position='topleft').add_to(m)
+
+
+    # Add Mouse Position display to show coordinates of the mouse pointer (bottom-right)
+    print("Adding MousePosition plugin...")
+    MousePosition(
+        position='bottomright',
+        separator=' | ',
+        empty_string='LatLng',
+        lng_first=False,
+        num_digits=4,
+        prefix='Coordinates: '
+    ).add_to(m)
+
+    # Add Measure Control to measure distances and areas on the map (bottom-left, will stack with Draw)
+    print("Adding MeasureControl plugin...")
+    MeasureControl(position='bottomleft', primary_length_unit='meters', secondary_length_unit='miles').add_to(m)
+
+
+    # --- 17. Add the Layer Control to the map ---
+    # This needs to be added AFTER all TileLayers and FeatureGroups
+    # so it can properly list them and allow toggling visibility.
+    print("Adding Layer Control...")
+    folium.LayerControl(position='bottomright').add_to(m)
+
+    return m
+
+
+# With the fixed RANDOM_SEED every run draws the same data, so a plain full build is all there is.
+# With the fixed RANDOM_SEED every run writes the same page, so a plain full build is all there is.
+# Pass '--new-data' (or set MAP_NEW_DATA=1) to draw new random data on every run instead. Only then
+# is the page skeleton cached next to the output and reused by the following runs, since that is
+# the only case where the data changes while the rest of the page stays the same.
+def main():
+    new_data = '--new-data' in sys.argv[1:] or os.environ.get('MAP_NEW_DATA') == '1'
+    data = simulate_data(None if new_data else RANDOM_SEED)
+
+    # --- 18. Save the map to an HTML file ---
+    # Every embedded GeoJSON/array is written as compact JSON (see map_helpers.compact_json)
+    page_skeleton = load_page_skeleton(output_file) if new_data else None
+    if page_skeleton is not None:
+        print("Map layout unchanged since the last run; filling the new simulated data into the cached page...")
+        with compact_json():
+            compressed_files = write_compressed(output_file, [fill_page_skeleton(page_skeleton, data)])
+    else:
+        m = build_map(data)
+        with compact_json():
+            compressed_files = save_compressed(m, output_file)
+            skeleton_saved = new_data and save_page_skeleton(output_file, data)
+        if skeleton_saved:
+            print(f"Page skeleton cached as '{output_file}.skeleton' for faster rebuilds")
+    print(f"Advanced map successfully generated and saved to '{output_file}'")
+    for compressed_file in compressed_files:
+        print(f"Compressed copy for static hosting saved to '{compressed_file}'")
+
+    # --- 19. Open the HTML file in the default web browser ---
+    webbrowser.open(output_file)
+
+
+if __name__ == '__main__':
+    main()
 
 # The map is now ready with multiple features, plugins, and enhancements.
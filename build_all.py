@@ -0,0 +1,65 @@
+# Build the version 1.0, 2.0 and 3.0 maps in a single Python process
+# Running each script on its own pays the folium import and Jinja template loading cost three times.
+# Here folium is imported once and its template environment (with the compiled templates) is reused
+# by every map that gets rendered afterwards.
+import os
+import runpy
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Import folium up front so every script below reuses the already-loaded module and templates
+import folium
+from map_helpers import save_compressed
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(BASE_DIR, 'build')
+
+
+# --- 1. Build one map from its version script ---
+# Each script builds its map as the module-level 'm' and only saves it when run directly
+# (under '__main__'). Here it is run under another name, so the script itself writes nothing,
+# and the map is saved under its own file name in the shared OUTPUT_DIR. All pages there refer to
+# the same ./assets/ folder, so the Leaflet and plugin scripts are downloaded once for every version.
+# 'before_save' names a function in the script that has to run before the map is saved (e.g. one
+# that looks up a tile URL online), so that work is not done while the script itself runs.
+def build_map(script, output_file, before_save=None):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(OUTPUT_DIR) # The scripts and save_compressed() download their assets into ./assets/
+    try:
+        namespace = runpy.run_path(os.path.join(BASE_DIR, script), run_name='build_all')
+        if before_save is not None:
+            namespace[before_save]()
+        save_compressed(namespace['m'], output_file)
+    finally:
+        os.chdir(cwd)
+    return os.path.join(OUTPUT_DIR, output_file)
+
+
+def build_v1():
+    return build_map('Interactive_map_version_1.0.py', 'interactive_map_v1.html')
+
+
+def build_v2():
+    return build_map('Interactive_map_version_2.0.py', 'interactive_map_v2.html')
+
+
+def build_v3():
+    return build_map('Interactive_map_version_3.0.py', 'interactive_map_v3.html', before_save='use_current_vector_tiles')
+
+
+BUILDS = [build_v1, build_v2, build_v3]
+
+
+# --- 2. Build all maps ---
+# Pass '--parallel' to render the three maps in separate worker processes at the same time.
+# Each worker imports folium once, so this only pays off on machines with spare CPU cores.
+if __name__ == '__main__':
+    print(f"Building {len(BUILDS)} maps (folium {folium.__version__})...")
+    if '--parallel' in sys.argv[1:]:
+        with ProcessPoolExecutor(max_workers=len(BUILDS)) as pool:
+            outputs = [future.result() for future in [pool.submit(build) for build in BUILDS]]
+    else:
+        outputs = [build() for build in BUILDS]
+    for path in outputs:
+        print(f"Built '{os.path.relpath(path, BASE_DIR)}'")
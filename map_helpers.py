@@ -0,0 +1,213 @@
+# Helpers shared by the Interactive_map_version_*.py scripts and build_all.py
+# Every version saves its map the same way: the page is rendered once and written as plain HTML
+# for opening locally plus pre-compressed copies for static hosting, with the Leaflet and plugin
+# scripts loaded from a local 'assets' folder. Keeping that code here means all versions use the
+# same compression settings and produce their output files the same way.
+# Versions 1.0 to 3.0 also take their common base map, landmarks and area features from here.
+import contextlib
+import gzip
+import hashlib
+import os
+import urllib.request
+# folium builds the map and layers shared by versions 1.0 to 3.0
+import folium
+# JavascriptLink is the element folium uses for <script src=...> tags in the page header
+from branca.element import JavascriptLink
+# Template gives access to the Jinja environment shared by all folium templates
+from folium.template import Template
+# Optional: used when installed, skipped otherwise
+try:
+    import brotli # Brotli-compressed copy of the output HTML
+except ImportError:
+    brotli = None
+
+ASSET_DIR = 'assets' # Local copies of the remote scripts and images, next to the output HTML
+FETCH_TIMEOUT = 3 # Seconds to wait for a download before keeping the remote URL
+# The pages are compressed once at build time and then served many times,
+# so the slowest, smallest settings are worth it
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+SAVE_STREAM_BUFFER = 256 # Template parts joined into one chunk per write
+JSON_SEPARATORS = (',', ':') # Compact JSON: no space after ',' or ':'
+
+
+# --- Shared map content of versions 1.0 to 3.0 ---
+# The early versions all start from the same London map with the same three landmarks, circle
+# marker and park polygon. Each version then styles the landmarks its own way and adds its own
+# layers on top, so only the parts they have in common are kept here.
+LONDON_CENTER = [51.5074, -0.1278]
+# Name, location (latitude, longitude) and popup text of every landmark
+LANDMARKS = (
+    ('London Eye', [51.5033, -0.1196], "Famous Ferris wheel on the South Bank of the River Thames."),
+    ('British Museum', [51.5194, -0.1269], "World-renowned museum of human history, art and culture."),
+    ('Buckingham Palace', [51.5014, -0.1419], "The King's official London residence."),
+)
+# Vertices of the small park polygon (latitude, longitude per row)
+PARK = [
+    [51.509, -0.10],
+    [51.509, -0.09],
+    [51.508, -0.09],
+    [51.508, -0.10],
+    [51.509, -0.10] # Close the polygon
+]
+
+def london_base_map(**options):
+    """Return the base map centered near London; 'options' are passed to folium.Map and override the defaults."""
+    # 'prefer_canvas' draws vector layers (circles, polygons, GeoJSON) on one <canvas> instead of one SVG node each
+    return folium.Map(**{'location': LONDON_CENTER, 'zoom_start': 10, 'tiles': 'OpenStreetMap', 'prefer_canvas': True, **options})
+
+def landmark_popup(name, description):
+    """Return the popup HTML of a landmark: its name in bold above the description."""
+    return f"<b>{name}</b><br>{description}"
+
+def city_circle_marker():
+    """Return the circle marker over the City of London financial district."""
+    return folium.CircleMarker(
+        location=[51.51, -0.09], # Center of the circle
+        radius=50, # Radius in pixels
+        popup="City of London Financial District",
+        color='#3186cc', # Border color
+        fill=True,
+        fill_color='#3186cc', # Fill color
+        fill_opacity=0.4 # Transparency of the fill
+    )
+
+def park_polygon():
+    """Return the polygon of the small park area outlined by PARK."""
+    return folium.Polygon(
+        locations=PARK,
+        color='green',
+        weight=3,
+        fill=True,
+        fill_color='lightgreen',
+        fill_opacity=0.6,
+        popup="Small Park Area"
+    )
+
+
+# --- Helper: register several layers on a parent in one step ---
+# Adds every child in 'children' to 'parent' with branca's add_child(), in list order, which is
+# also the order their scripts are rendered in. Returns 'parent', so the call can be chained.
+def bulk_add(parent, children):
+    for child in children:
+        parent.add_child(child)
+    return parent
+
+
+# --- Helper: trim GeoJSON coordinate precision ---
+# 'obj' is a FeatureCollection, a geometry, or a (nested) list of coordinates. Collections and
+# geometries are rounded in place and returned; lists are returned as new rounded lists.
+# Six decimal places is roughly 10 cm on the ground, which is plenty for a web map
+# and keeps the coordinates embedded in the output HTML short.
+def round_coords(obj, ndigits=6):
+    if isinstance(obj, dict):
+        if 'features' in obj:
+            for feature in obj['features']:
+                round_coords(feature['geometry'], ndigits)
+        elif 'coordinates' in obj:
+            obj['coordinates'] = round_coords(obj['coordinates'], ndigits)
+        return obj
+    if isinstance(obj, (list, tuple)):
+        return [round_coords(v, ndigits) for v in obj]
+    return round(obj, ndigits)
+
+
+# --- Helper: download a remote file once into the local 'assets' folder ---
+# Returns the relative path to use in the HTML, or the original URL if the download fails
+# (e.g. when offline), so the map still works either way.
+# The local name starts with a hash of the full URL, so two URLs ending in the same file name
+# (e.g. two CDN versions of 'leaflet.js') never share a copy. 'filename' (by default the last part
+# of the URL path) only keeps the name readable and its extension intact.
+# A URL that failed once is not tried again in the same process, so an offline build waits at
+# most FETCH_TIMEOUT seconds per URL.
+# The file is written under a temporary name and then renamed, so builds running in parallel
+# never see a half-written asset.
+_failed_urls = set()
+
+def fetch_asset(url, filename=None):
+    if url in _failed_urls:
+        return url
+    if filename is None:
+        filename = url.split('?')[0].rsplit('/', 1)[-1]
+    filename = hashlib.sha256(url.encode('utf-8')).hexdigest()[:12] + '-' + filename
+    path = os.path.join(ASSET_DIR, filename)
+    if not os.path.exists(path):
+        try:
+            with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as response:
+                data = response.read()
+        except OSError:
+            _failed_urls.add(url)
+            return url
+        os.makedirs(ASSET_DIR, exist_ok=True)
+        partial = f'{path}.{os.getpid()}.part'
+        with open(partial, 'wb') as f:
+            f.write(data)
+        os.replace(partial, path)
+    return ASSET_DIR + '/' + filename
+
+
+# --- Helper: load the Leaflet and plugin scripts from the local 'assets' folder ---
+# Every version of the map references the same scripts on public CDNs. Downloading them once
+# into ./assets/ and pointing the <script> tags there lets the browser read them from disk and
+# reuse its cached copy across all the generated maps.
+# Stylesheets stay on the CDN because they load their fonts and images by relative path.
+def localize_scripts(root):
+    for element in root.header._children.values():
+        if isinstance(element, JavascriptLink) and element.url.startswith('http'):
+            element.url = fetch_asset(element.url)
+
+
+# --- Helper: embed data as compact JSON while a map is rendered ---
+# Folium writes every data literal into the page through Jinja's 'tojson' filter, which by default
+# pads each separator with a space. All folium templates share one Jinja environment, so inside a
+# 'with compact_json():' block its JSON policy is switched to JSON_SEPARATORS (and, if given, to
+# another 'dumps_function' such as orjson). The previous policy is restored when the block ends,
+# so maps rendered later in the same process (e.g. by build_all.py) are not affected.
+@contextlib.contextmanager
+def compact_json(dumps_function=None):
+    policies = Template("").environment.policies
+    saved = {key: policies[key] for key in ('json.dumps_function', 'json.dumps_kwargs')}
+    policies['json.dumps_kwargs'] = {**saved['json.dumps_kwargs'], 'separators': JSON_SEPARATORS}
+    if dumps_function is not None:
+        policies['json.dumps_function'] = dumps_function
+    try:
+        yield
+    finally:
+        policies.update(saved)
+
+
+# --- Helper: write a page as plain and pre-compressed HTML ---
+# 'chunks' is any iterable of text parts (a template stream or a single string in a list).
+# Everything is written in one pass to 'path' for opening locally, 'path.gz' and, when brotli is
+# installed, 'path.br' for static hosting, which cuts the transfer size several times.
+# Serve the compressed copies with 'Content-Encoding: gzip' / 'Content-Encoding: br'
+# (e.g. 'AddEncoding gzip .gz' on Apache). Returns the paths of the compressed copies.
+def write_compressed(path, chunks):
+    br = brotli.Compressor(quality=BROTLI_QUALITY) if brotli is not None else None
+    with open(path, 'w', encoding='utf-8', buffering=1 << 20) as f, \
+            gzip.open(path + '.gz', 'wt', encoding='utf-8', compresslevel=GZIP_LEVEL) as gz, \
+            (open(path + '.br', 'wb') if br is not None else contextlib.nullcontext()) as br_file:
+        for chunk in chunks:
+            f.write(chunk)
+            gz.write(chunk)
+            if br is not None:
+                br_file.write(br.process(chunk.encode('utf-8')))
+        if br is not None:
+            br_file.write(br.finish())
+    return [path + '.gz'] + ([path + '.br'] if br is not None else [])
+
+
+# --- Helper: save a folium map as plain and pre-compressed HTML ---
+# Does the same steps as Map.save(), but streams the page template with Jinja's stream(), so the
+# full HTML document is never held in memory as one string. Buffering joins every
+# SAVE_STREAM_BUFFER template parts into one chunk, so the files get a few large writes instead
+# of one small write per template fragment. Returns the paths of the compressed copies.
+def save_compressed(m, path):
+    root = m.get_root()
+    # Same steps as Figure.render(): let every child register its scripts and styles first
+    for child in root._children.values():
+        child.render()
+    localize_scripts(root)
+    stream = root._template.stream(this=root, kwargs={})
+    stream.enable_buffering(SAVE_STREAM_BUFFER)
+    return write_compressed(path, stream)